@@ -1,28 +1,246 @@
 import pandas as pd
 import numpy as np
+import polars as pl
+from numba import njit, types
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+import heapq
+import itertools
+
+NS_PER_MINUTE = 60_000_000_000
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+# Repeated string keys that calculate_metrics dictionary-encodes once
+CATEGORICAL_COLUMNS = ('category', 'store_id', 'payment_method', 'product_name', 'customer_id')
+
+# Kernel argument types; read-only 'A' arrays also accept writable and strided inputs
+_F8 = types.Array(types.float64, 1, 'A', readonly=True)
+_I4 = types.Array(types.int32, 1, 'A', readonly=True)
+_I8 = types.Array(types.int64, 1, 'A', readonly=True)
+
+@njit(types.UniTuple(types.float64, 2)(_F8, _F8), cache=True, fastmath=True)
+def _summary_sums(amount, quantity):
+    """Sum transaction amounts and quantities in one pass"""
+    revenue = 0.0
+    units = 0.0
+    for i in range(amount.shape[0]):
+        revenue += amount[i]
+        units += quantity[i]
+    return revenue, units
+
+@njit(types.float64[:](_I8, _F8, _I8), cache=True, fastmath=True)
+def _group_dense_rank(group_codes, values, order):
+    """Dense rank within groups, walking rows pre-sorted by (group, -value)"""
+    ranks = np.empty(order.shape[0], dtype=np.float64)
+    rank = 0.0
+    for i in range(order.shape[0]):
+        row = order[i]
+        if i == 0 or group_codes[row] != group_codes[order[i - 1]]:
+            rank = 1.0
+        elif values[row] != values[order[i - 1]]:
+            rank += 1.0
+        ranks[row] = rank
+    return ranks
+
+@njit(types.Tuple((types.float64[:], types.int64[:], types.float64[:], types.int64[:], types.int64[:]))(
+    _I8, _I4, _F8, _F8, _I4, _I4, types.int64, types.int64, types.int64), cache=True, fastmath=True)
+def _customer_segments(order, cust_codes, amount, quantity, cat_codes, store_codes, n_cust, n_cat, n_store):
+    """Per-customer spend, transactions, items and distinct categories/stores in one segmented scan"""
+    total_spent = np.zeros(n_cust)
+    transaction_count = np.zeros(n_cust, dtype=np.int64)
+    total_items = np.zeros(n_cust)
+    categories_shopped = np.zeros(n_cust, dtype=np.int64)
+    stores_visited = np.zeros(n_cust, dtype=np.int64)
+    
+    # Last customer that touched each category/store; rows arrive grouped by customer
+    cat_seen = np.full(n_cat, -1, dtype=np.int64)
+    store_seen = np.full(n_store, -1, dtype=np.int64)
+    for i in range(order.shape[0]):
+        row = order[i]
+        c = cust_codes[row]
+        total_spent[c] += amount[row]
+        transaction_count[c] += 1
+        total_items[c] += quantity[row]
+        if cat_seen[cat_codes[row]] != c:
+            cat_seen[cat_codes[row]] = c
+            categories_shopped[c] += 1
+        if store_seen[store_codes[row]] != c:
+            store_seen[store_codes[row]] = c
+            stores_visited[c] += 1
+    return total_spent, transaction_count, total_items, categories_shopped, stores_visited
+
+@njit(types.int64[:](_F8, _F8, types.int64), cache=True, fastmath=True)
+def _lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: keep the point of each bucket spanning the largest triangle"""
+    n = x.shape[0]
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[n_out - 1] = n - 1
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        # Average of the next bucket is the third triangle vertex
+        avg_start = int(np.floor((i + 1) * every)) + 1
+        avg_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = 0.0
+        avg_y = 0.0
+        for j in range(avg_start, avg_end):
+            avg_x += x[j]
+            avg_y += y[j]
+        avg_x /= avg_end - avg_start
+        avg_y /= avg_end - avg_start
+        
+        best = int(np.floor(i * every)) + 1
+        max_area = -1.0
+        for j in range(best, int(np.floor((i + 1) * every)) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > max_area:
+                max_area = area
+                best = j
+        selected[i + 1] = best
+        a = best
+    return selected
+
+def lttb_indices(x, y, n_out=500):
+    """Positions of an LTTB downsample of a series sorted by x (all positions if already small)"""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    return _lttb(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), n_out)
+
+def _timestamps_ns(data):
+    """Timestamp column as int64 nanoseconds, parsing only when not already datetime64"""
+    timestamps = data['timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps)
+    return timestamps.to_numpy(dtype='datetime64[ns]').view('i8')
+
+def _read_only(values):
+    values.flags.writeable = False
+    return values
+
+@dataclass(frozen=True)
+class TransactionBatch:
+    """Column arrays (struct-of-arrays) for a transaction frame, extracted once and read-only"""
+    ts_ns: np.ndarray
+    hour: np.ndarray
+    dow: np.ndarray
+    minute: np.ndarray
+    amount: np.ndarray
+    quantity: np.ndarray
+    unit_price: np.ndarray
+    category_codes: np.ndarray
+    categories: pd.Index
+    store_codes: np.ndarray
+    stores: pd.Index
+    payment_codes: np.ndarray
+    payments: pd.Index
+    product_codes: np.ndarray
+    products: pd.Index
+    customer_codes: np.ndarray
+    customers: pd.Index
+    
+    @classmethod
+    def from_pandas(cls, data):
+        """Extract numeric arrays, integer time parts and sorted int32 key codes"""
+        ts_ns = _timestamps_ns(data)
+        
+        # 1970-01-01 was a Thursday (dayofweek 3)
+        columns = {
+            'ts_ns': ts_ns,
+            'hour': ((ts_ns // NS_PER_HOUR) % 24).astype(np.int8),
+            'dow': ((ts_ns // NS_PER_DAY + 3) % 7).astype(np.int8),
+            'minute': ((ts_ns // NS_PER_MINUTE) % 60).astype(np.int8),
+            'amount': data['total_amount'].to_numpy(dtype=np.float64),
+            'quantity': data['quantity'].to_numpy(dtype=np.float64),
+            'unit_price': data['unit_price'].to_numpy(dtype=np.float64)
+        }
+        
+        # Sorted codes: code order is value order, so argmax ties pick the smallest value
+        for prefix, col, uniques_name in (('category', 'category', 'categories'), ('store', 'store_id', 'stores'),
+                                          ('payment', 'payment_method', 'payments'), ('product', 'product_name', 'products'),
+                                          ('customer', 'customer_id', 'customers')):
+            values = data[col]
+            if isinstance(values.dtype, pd.CategoricalDtype) and not values.cat.categories.is_monotonic_increasing:
+                # Categorical codes follow declaration order; re-sort so code order is value order again
+                values = values.cat.reorder_categories(values.cat.categories.sort_values())
+            codes, uniques = pd.factorize(values, sort=True)
+            columns[f'{prefix}_codes'] = codes.astype(np.int32)
+            columns[uniques_name] = pd.Index(uniques)
+        
+        for values in columns.values():
+            if isinstance(values, np.ndarray):
+                _read_only(values)
+        
+        return cls(**columns)
+    
+    def __len__(self):
+        return len(self.ts_ns)
 
 class AnalyticsEngine:
     """Engine for calculating retail analytics metrics"""
     
-    def __init__(self):
-        pass
+    def __init__(self, use_polars=True, kpi_lookback_minutes=10):
+        self.use_polars = use_polars
+        
+        # Sliding KPI window maintained by ingest(); a heap keyed on timestamp so
+        # out-of-order arrivals still evict correctly
+        self.kpi_lookback = timedelta(minutes=kpi_lookback_minutes)
+        self._window = []
+        self._window_seq = itertools.count()
+        self._window_latest = None
+        self._window_revenue = 0.0
+        self._window_products = Counter()
+        self._window_stores = Counter()
     
     def calculate_metrics(self, data):
         """Calculate comprehensive retail metrics"""
         if data.empty:
             return self._empty_metrics()
         
+        # Dictionary-encode the string keys once so grouping works on integer codes
+        data = data.assign(**{
+            col: data[col].astype('category')
+            for col in CATEGORICAL_COLUMNS if not isinstance(data[col].dtype, pd.CategoricalDtype)
+        })
+        
+        # Arrays shared read-only by the array-based calculations
+        batch = self.prepare(data)
+        
+        if self.use_polars:
+            category_performance, store_performance, product_performance = self._calculate_group_performance(data)
+        else:
+            category_performance = self._calculate_category_performance(data)
+            store_performance = self._calculate_store_performance(data)
+            product_performance = self._calculate_product_performance(data)
+        
         return {
-            'summary_stats': self._calculate_summary_stats(data),
-            'time_series': self._calculate_time_series(data),
-            'category_performance': self._calculate_category_performance(data),
-            'store_performance': self._calculate_store_performance(data),
-            'product_performance': self._calculate_product_performance(data),
-            'customer_insights': self._calculate_customer_insights(data),
-            'trends': self._calculate_trends(data)
+            'summary_stats': self._calculate_summary_stats(batch),
+            'time_series': self._calculate_time_series(batch),
+            'category_performance': category_performance,
+            'store_performance': store_performance,
+            'product_performance': product_performance,
+            'customer_insights': self._calculate_customer_insights(batch),
+            'trends': self._calculate_trends(batch)
         }
     
+    @staticmethod
+    def prepare(data):
+        """Convert a transaction frame into a read-only TransactionBatch"""
+        return TransactionBatch.from_pandas(data)
+    
+    def format_for_display(self, metrics):
+        """Round floats and float columns in a metrics dict to 2 decimals for presentation"""
+        if isinstance(metrics, dict):
+            return {key: self.format_for_display(value) for key, value in metrics.items()}
+        if isinstance(metrics, pd.DataFrame):
+            return metrics.round(2)
+        if isinstance(metrics, (float, np.floating)):
+            return round(metrics, 2)
+        return metrics
+    
     def _empty_metrics(self):
         """Return empty metrics structure"""
         return {
@@ -35,54 +253,138 @@ class AnalyticsEngine:
             'trends': {}
         }
     
-    def _calculate_summary_stats(self, data):
+    def _calculate_summary_stats(self, batch):
         """Calculate basic summary statistics"""
+        amount = batch.amount
+        n = len(batch)
+        total_revenue, total_units = _summary_sums(amount, batch.quantity)
+        
+        # Median from the middle order statistic(s) without a full sort
+        mid = n // 2
+        if n % 2:
+            median = np.partition(amount, mid)[mid]
+        else:
+            part = np.partition(amount, (mid - 1, mid))
+            median = (part[mid - 1] + part[mid]) / 2
+        
+        # Factorized uniques are exactly the observed values
+        unique_customers = len(batch.customers)
+        
         return {
-            'total_revenue': data['total_amount'].sum(),
-            'total_transactions': len(data),
-            'average_transaction_value': data['total_amount'].mean(),
-            'median_transaction_value': data['total_amount'].median(),
-            'total_units_sold': data['quantity'].sum(),
-            'unique_products': data['product_name'].nunique(),
-            'unique_customers': data['customer_id'].nunique(),
-            'unique_stores': data['store_id'].nunique(),
-            'revenue_per_customer': data.groupby('customer_id')['total_amount'].sum().mean(),
-            'transactions_per_customer': data.groupby('customer_id').size().mean(),
-            'most_popular_payment': data['payment_method'].mode().iloc[0] if not data.empty else None
+            'total_revenue': total_revenue,
+            'total_transactions': n,
+            'average_transaction_value': total_revenue / n,
+            'median_transaction_value': median,
+            'total_units_sold': int(total_units),
+            'unique_products': len(batch.products),
+            'unique_customers': unique_customers,
+            'unique_stores': len(batch.stores),
+            # Mean of per-customer sums/counts reduces to totals over customers
+            'revenue_per_customer': total_revenue / unique_customers,
+            'transactions_per_customer': n / unique_customers,
+            'most_popular_payment': batch.payments[np.argmax(np.bincount(batch.payment_codes))]
         }
     
-    def _calculate_time_series(self, data):
+    def _calculate_time_series(self, batch):
         """Calculate time-based metrics"""
-        if data.empty:
+        if len(batch) == 0:
             return pd.DataFrame()
         
-        # Ensure timestamp is datetime
-        data = data.copy()
-        data['timestamp'] = pd.to_datetime(data['timestamp'])
+        # Hourly buckets by integer floor on the nanosecond timestamps
+        hour_start, bucket = np.unique(batch.ts_ns // NS_PER_HOUR * NS_PER_HOUR, return_inverse=True)
         
         # Create time series with different granularities
-        hourly_sales = data.groupby(data['timestamp'].dt.floor('H')).agg({
-            'total_amount': 'sum',
-            'transaction_id': 'count',
-            'quantity': 'sum'
-        }).rename(columns={'transaction_id': 'transaction_count'})
+        hourly_sales = pd.DataFrame({
+            'timestamp': hour_start.view('datetime64[ns]'),
+            'total_amount': np.bincount(bucket, weights=batch.amount),
+            'transaction_count': np.bincount(bucket),
+            'quantity': np.bincount(bucket, weights=batch.quantity).astype(np.int64)
+        })
         
         # Add moving averages
         if len(hourly_sales) >= 3:
             hourly_sales['revenue_ma_3'] = hourly_sales['total_amount'].rolling(window=3, min_periods=1).mean()
         
-        return hourly_sales.reset_index()
+        return hourly_sales
+    
+    def _calculate_group_performance(self, data):
+        """Calculate category, store and product metrics in a single Polars plan"""
+        # Convert once; the three group-bys share the scan and run multi-threaded
+        lf = pl.from_pandas(data).lazy()
+        
+        frames = pl.collect_all([
+            self._category_performance_query(lf),
+            self._store_performance_query(lf),
+            self._product_performance_query(lf)
+        ], engine='streaming')
+        
+        return tuple(frame.to_pandas() for frame in frames)
+    
+    def _category_performance_query(self, lf):
+        """Build the lazy category-wise performance query"""
+        return (
+            lf.group_by('category')
+            .agg(
+                pl.col('total_amount').sum().alias('revenue'),
+                pl.col('total_amount').mean().alias('avg_transaction'),
+                pl.len().cast(pl.Int64).alias('transaction_count'),
+                pl.col('quantity').sum().alias('units_sold'),
+                pl.col('unit_price').mean().alias('avg_unit_price')
+            )
+            .with_columns(
+                (pl.col('revenue') / pl.col('revenue').sum() * 100).alias('market_share_pct'),
+                (pl.col('revenue') / pl.col('transaction_count')).alias('revenue_per_transaction')
+            )
+            .sort('revenue', descending=True)
+        )
+    
+    def _store_performance_query(self, lf):
+        """Build the lazy store-wise performance query"""
+        return (
+            lf.group_by('store_id')
+            .agg(
+                pl.col('total_amount').sum().alias('revenue'),
+                pl.col('total_amount').mean().alias('avg_transaction'),
+                pl.len().cast(pl.Int64).alias('transaction_count'),
+                pl.col('quantity').sum().alias('units_sold'),
+                pl.col('customer_id').n_unique().cast(pl.Int64).alias('unique_customers'),
+                pl.col('product_name').n_unique().cast(pl.Int64).alias('unique_products')
+            )
+            .with_columns(
+                (pl.col('revenue') / pl.col('unique_customers')).alias('revenue_per_customer'),
+                (pl.col('transaction_count') / pl.col('unique_customers')).alias('transactions_per_customer')
+            )
+            .sort('revenue', descending=True)
+        )
+    
+    def _product_performance_query(self, lf):
+        """Build the lazy product-wise performance query"""
+        return (
+            lf.group_by(['product_name', 'category'])
+            .agg(
+                pl.col('total_amount').sum().alias('revenue'),
+                pl.col('total_amount').mean().alias('avg_transaction'),
+                pl.col('quantity').sum().alias('quantity_sold'),
+                pl.col('transaction_id').count().cast(pl.Int64).alias('transaction_count'),
+                pl.col('unit_price').mean().alias('avg_unit_price')
+            )
+            .with_columns(
+                pl.col('revenue').rank(method='dense', descending=True).over('category')
+                .cast(pl.Float64).alias('category_rank')
+            )
+            .sort('revenue', descending=True)
+        )
     
     def _calculate_category_performance(self, data):
         """Calculate category-wise performance metrics"""
         if data.empty:
             return pd.DataFrame()
         
-        category_metrics = data.groupby('category').agg({
+        category_metrics = data.groupby('category', observed=True).agg({
             'total_amount': ['sum', 'mean', 'count'],
             'quantity': 'sum',
             'unit_price': 'mean'
-        }).round(2)
+        })
         
         # Flatten column names
         category_metrics.columns = ['revenue', 'avg_transaction', 'transaction_count', 'units_sold', 'avg_unit_price']
@@ -90,10 +392,10 @@ class AnalyticsEngine:
         
         # Calculate market share
         total_revenue = category_metrics['revenue'].sum()
-        category_metrics['market_share_pct'] = (category_metrics['revenue'] / total_revenue * 100).round(2)
+        category_metrics['market_share_pct'] = (category_metrics['revenue'] / total_revenue * 100)
         
         # Calculate revenue per transaction
-        category_metrics['revenue_per_transaction'] = (category_metrics['revenue'] / category_metrics['transaction_count']).round(2)
+        category_metrics['revenue_per_transaction'] = (category_metrics['revenue'] / category_metrics['transaction_count'])
         
         return category_metrics.sort_values('revenue', ascending=False)
     
@@ -102,12 +404,12 @@ class AnalyticsEngine:
         if data.empty:
             return pd.DataFrame()
         
-        store_metrics = data.groupby('store_id').agg({
+        store_metrics = data.groupby('store_id', observed=True).agg({
             'total_amount': ['sum', 'mean', 'count'],
             'quantity': 'sum',
             'customer_id': 'nunique',
             'product_name': 'nunique'
-        }).round(2)
+        })
         
         # Flatten column names
         store_metrics.columns = ['revenue', 'avg_transaction', 'transaction_count', 
@@ -115,8 +417,8 @@ class AnalyticsEngine:
         store_metrics = store_metrics.reset_index()
         
         # Calculate additional metrics
-        store_metrics['revenue_per_customer'] = (store_metrics['revenue'] / store_metrics['unique_customers']).round(2)
-        store_metrics['transactions_per_customer'] = (store_metrics['transaction_count'] / store_metrics['unique_customers']).round(2)
+        store_metrics['revenue_per_customer'] = (store_metrics['revenue'] / store_metrics['unique_customers'])
+        store_metrics['transactions_per_customer'] = (store_metrics['transaction_count'] / store_metrics['unique_customers'])
         
         return store_metrics.sort_values('revenue', ascending=False)
     
@@ -125,12 +427,12 @@ class AnalyticsEngine:
         if data.empty:
             return pd.DataFrame()
         
-        product_metrics = data.groupby(['product_name', 'category']).agg({
+        product_metrics = data.groupby(['product_name', 'category'], observed=True).agg({
             'total_amount': ['sum', 'mean'],
             'quantity': 'sum',
             'transaction_id': 'count',
             'unit_price': 'mean'
-        }).round(2)
+        })
         
         # Flatten column names
         product_metrics.columns = ['revenue', 'avg_transaction', 'quantity_sold', 
@@ -138,109 +440,212 @@ class AnalyticsEngine:
         product_metrics = product_metrics.reset_index()
         
         # Calculate revenue rank within category
-        product_metrics['category_rank'] = product_metrics.groupby('category')['revenue'].rank(ascending=False, method='dense')
+        cat_codes = pd.factorize(product_metrics['category'])[0]
+        revenue = product_metrics['revenue'].to_numpy(dtype=np.float64)
+        order = np.lexsort((-revenue, cat_codes))
+        product_metrics['category_rank'] = _group_dense_rank(cat_codes, revenue, order)
         
         return product_metrics.sort_values('revenue', ascending=False)
     
-    def _calculate_customer_insights(self, data):
+    def _calculate_customer_insights(self, batch):
         """Calculate customer behavior insights"""
-        if data.empty:
+        if len(batch) == 0:
             return {}
         
-        customer_metrics = data.groupby('customer_id').agg({
-            'total_amount': ['sum', 'mean', 'count'],
-            'quantity': 'sum',
-            'category': lambda x: x.nunique(),
-            'store_id': lambda x: x.nunique()
-        })
+        order = np.argsort(batch.customer_codes, kind='stable')
         
-        # Flatten column names
-        customer_metrics.columns = ['total_spent', 'avg_transaction', 'transaction_count',
-                                   'total_items', 'categories_shopped', 'stores_visited']
+        total_spent, transaction_count, _, categories_shopped, stores_visited = _customer_segments(
+            order, batch.customer_codes, batch.amount, batch.quantity, batch.category_codes,
+            batch.store_codes, len(batch.customers), len(batch.categories), len(batch.stores)
+        )
+        
+        # 90th percentile spend as an order statistic (quantile method='lower'), no sort
+        k = int(0.9 * (len(total_spent) - 1))
+        high_value_threshold = np.partition(total_spent, k)[k]
         
         return {
-            'total_customers': len(customer_metrics),
-            'avg_customer_value': customer_metrics['total_spent'].mean(),
-            'avg_transactions_per_customer': customer_metrics['transaction_count'].mean(),
-            'avg_categories_per_customer': customer_metrics['categories_shopped'].mean(),
-            'avg_stores_per_customer': customer_metrics['stores_visited'].mean(),
-            'high_value_customers': len(customer_metrics[customer_metrics['total_spent'] > customer_metrics['total_spent'].quantile(0.9)]),
-            'frequent_customers': len(customer_metrics[customer_metrics['transaction_count'] >= 3])
+            'total_customers': len(batch.customers),
+            'avg_customer_value': total_spent.mean(),
+            'avg_transactions_per_customer': transaction_count.mean(),
+            'avg_categories_per_customer': categories_shopped.mean(),
+            'avg_stores_per_customer': stores_visited.mean(),
+            'high_value_customers': int(np.count_nonzero(total_spent > high_value_threshold)),
+            'frequent_customers': int(np.count_nonzero(transaction_count >= 3))
         }
     
-    def _calculate_trends(self, data):
+    def _calculate_trends(self, batch):
         """Calculate trend analysis"""
-        if data.empty or len(data) < 2:
+        if len(batch) < 2:
             return {}
         
-        data = data.copy()
-        data['timestamp'] = pd.to_datetime(data['timestamp'])
-        data = data.sort_values('timestamp')
-        
-        # Calculate growth trends
-        recent_data = data.tail(len(data) // 2) if len(data) > 4 else data
-        older_data = data.head(len(data) // 2) if len(data) > 4 else data
-        
-        if not recent_data.empty and not older_data.empty:
-            recent_avg_revenue = recent_data['total_amount'].mean()
-            older_avg_revenue = older_data['total_amount'].mean()
-            
-            revenue_growth = ((recent_avg_revenue - older_avg_revenue) / older_avg_revenue * 100) if older_avg_revenue > 0 else 0
-            
-            recent_transaction_count = len(recent_data)
-            older_transaction_count = len(older_data)
-            
-            transaction_growth = ((recent_transaction_count - older_transaction_count) / older_transaction_count * 100) if older_transaction_count > 0 else 0
+        # Time order as row positions; skip the sort when already monotonic
+        ts_ns = batch.ts_ns
+        n = len(ts_ns)
+        if np.all(ts_ns[1:] >= ts_ns[:-1]):
+            order = np.arange(n)
         else:
-            revenue_growth = 0
-            transaction_growth = 0
+            order = np.argsort(ts_ns, kind='stable')
         
-        # Peak hours analysis
-        data['hour'] = data['timestamp'].dt.hour
-        hourly_transactions = data.groupby('hour').size()
-        peak_hour = hourly_transactions.idxmax() if not hourly_transactions.empty else None
+        # Calculate growth trends on the older/recent halves
+        half = n // 2
+        recent_rows = order[n - half:] if n > 4 else order
+        older_rows = order[:half] if n > 4 else order
         
-        # Category trends
-        category_recent = recent_data.groupby('category')['total_amount'].sum() if not recent_data.empty else pd.Series()
-        category_older = older_data.groupby('category')['total_amount'].sum() if not older_data.empty else pd.Series()
+        amount = batch.amount
+        recent_avg_revenue = amount[recent_rows].mean()
+        older_avg_revenue = amount[older_rows].mean()
         
-        growing_categories = []
-        for category in category_recent.index:
-            if category in category_older.index and category_older[category] > 0:
-                growth = (category_recent[category] - category_older[category]) / category_older[category] * 100
-                if growth > 0:
-                    growing_categories.append((category, growth))
+        revenue_growth = ((recent_avg_revenue - older_avg_revenue) / older_avg_revenue * 100) if older_avg_revenue > 0 else 0
+        
+        recent_transaction_count = len(recent_rows)
+        older_transaction_count = len(older_rows)
+        
+        transaction_growth = ((recent_transaction_count - older_transaction_count) / older_transaction_count * 100) if older_transaction_count > 0 else 0
+        
+        # Peak hours analysis
+        peak_hour = int(np.bincount(batch.hour, minlength=24).argmax())
         
-        growing_categories = sorted(growing_categories, key=lambda x: x[1], reverse=True)
+        # Category trends
+        cat_codes = batch.category_codes
+        categories = batch.categories
+        n_cats = len(categories)
+        
+        recent_codes = cat_codes[recent_rows]
+        older_codes = cat_codes[older_rows]
+        category_recent = np.bincount(recent_codes, weights=amount[recent_rows], minlength=n_cats)
+        category_older = np.bincount(older_codes, weights=amount[older_rows], minlength=n_cats)
+        
+        # Categories seen in both halves whose revenue grew
+        eligible = (np.bincount(recent_codes, minlength=n_cats) > 0) & (category_older > 0)
+        growth = np.zeros(n_cats)
+        growth[eligible] = (category_recent[eligible] - category_older[eligible]) / category_older[eligible] * 100
+        growing = np.nonzero(eligible & (growth > 0))[0]
+        growing = growing[np.argsort(-growth[growing], kind='stable')][:3]
         
         return {
             'revenue_growth_percent': round(revenue_growth, 2),
             'transaction_growth_percent': round(transaction_growth, 2),
             'peak_hour': peak_hour,
-            'growing_categories': growing_categories[:3] if growing_categories else [],
-            'data_timespan_minutes': (data['timestamp'].max() - data['timestamp'].min()).total_seconds() / 60
+            'growing_categories': [(categories[i], growth[i]) for i in growing],
+            'data_timespan_minutes': (ts_ns[order[-1]] - ts_ns[order[0]]) / NS_PER_MINUTE
+        }
+    
+    def _real_time_kpis_query(self, data, ts_ns, cutoff_ns, lookback_minutes):
+        """Real-time KPIs as one lazy Polars filter + aggregate pass"""
+        lf = (
+            pl.from_pandas(data[['total_amount', 'product_name', 'store_id']])
+            .with_columns(pl.Series('ts_ns', ts_ns))
+            .lazy()
+        )
+        
+        kpis = (
+            lf.filter(pl.col('ts_ns') >= cutoff_ns)
+            .select(
+                pl.len().alias('transactions_last_10min'),
+                pl.col('total_amount').sum().alias('revenue_last_10min'),
+                pl.col('total_amount').mean().alias('avg_transaction_last_10min'),
+                # Smallest of tied modes, matching pandas mode()
+                pl.col('product_name').cast(pl.String).mode().sort().first().alias('top_product_last_10min'),
+                pl.col('store_id').n_unique().alias('active_stores_last_10min')
+            )
+            .collect(engine='streaming')
+            .row(0, named=True)
+        )
+        
+        if kpis['transactions_last_10min'] == 0:
+            return {}
+        
+        kpis['revenue_per_minute'] = kpis['revenue_last_10min'] / lookback_minutes
+        return kpis
+    
+    def ingest(self, transactions):
+        """Add new transactions (dict, Series or DataFrame) to the real-time KPI window"""
+        if isinstance(transactions, pd.DataFrame):
+            rows = zip(pd.to_datetime(transactions['timestamp']), transactions['total_amount'],
+                       transactions['product_name'], transactions['store_id'])
+        else:
+            rows = [(pd.Timestamp(transactions['timestamp']), transactions['total_amount'],
+                     transactions['product_name'], transactions['store_id'])]
+        
+        for timestamp, amount, product, store in rows:
+            if self._window_latest is None or timestamp > self._window_latest:
+                self._window_latest = timestamp
+            if timestamp < self._window_latest - self.kpi_lookback:
+                continue
+            heapq.heappush(self._window, (timestamp, next(self._window_seq), amount, product, store))
+            self._window_revenue += amount
+            self._window_products[product] += 1
+            self._window_stores[store] += 1
+        
+        # Evict entries that fell out of the lookback window
+        cutoff_time = self._window_latest - self.kpi_lookback if self._window_latest is not None else None
+        while self._window and self._window[0][0] < cutoff_time:
+            _, _, amount, product, store = heapq.heappop(self._window)
+            self._window_revenue -= amount
+            self._window_products[product] -= 1
+            if not self._window_products[product]:
+                del self._window_products[product]
+            self._window_stores[store] -= 1
+            if not self._window_stores[store]:
+                del self._window_stores[store]
+    
+    def _window_kpis(self):
+        """Real-time KPIs from the running window state"""
+        if not self._window:
+            return {}
+        
+        count = len(self._window)
+        top_count = max(self._window_products.values())
+        lookback_minutes = self.kpi_lookback.total_seconds() / 60
+        
+        return {
+            'transactions_last_10min': count,
+            'revenue_last_10min': self._window_revenue,
+            'avg_transaction_last_10min': self._window_revenue / count,
+            'top_product_last_10min': min(p for p, c in self._window_products.items() if c == top_count),
+            'active_stores_last_10min': len(self._window_stores),
+            'revenue_per_minute': self._window_revenue / lookback_minutes
         }
     
-    def get_real_time_kpis(self, data, lookback_minutes=10):
-        """Calculate real-time KPIs for dashboard"""
+    def get_real_time_kpis(self, data=None, lookback_minutes=10):
+        """Calculate real-time KPIs for dashboard; without data, use the ingest() window"""
+        if data is None:
+            return self._window_kpis()
+        
         if data.empty:
             return {}
         
-        data = data.copy()
-        data['timestamp'] = pd.to_datetime(data['timestamp'])
+        if self.use_polars:
+            ts_ns = _timestamps_ns(data)
+            cutoff_ns = ts_ns.max() - lookback_minutes * NS_PER_MINUTE
+            return self._real_time_kpis_query(data, ts_ns, cutoff_ns, lookback_minutes)
+        
+        batch = self.prepare(data)
         
         # Filter to recent data
-        cutoff_time = data['timestamp'].max() - timedelta(minutes=lookback_minutes)
-        recent_data = data[data['timestamp'] >= cutoff_time]
+        recent = batch.ts_ns >= batch.ts_ns.max() - lookback_minutes * NS_PER_MINUTE
+        recent_amount = batch.amount[recent]
         
-        if recent_data.empty:
+        if len(recent_amount) == 0:
             return {}
         
         return {
-            'transactions_last_10min': len(recent_data),
-            'revenue_last_10min': recent_data['total_amount'].sum(),
-            'avg_transaction_last_10min': recent_data['total_amount'].mean(),
-            'top_product_last_10min': recent_data['product_name'].mode().iloc[0] if not recent_data.empty else None,
-            'active_stores_last_10min': recent_data['store_id'].nunique(),
-            'revenue_per_minute': recent_data['total_amount'].sum() / lookback_minutes
+            'transactions_last_10min': len(recent_amount),
+            'revenue_last_10min': recent_amount.sum(),
+            'avg_transaction_last_10min': recent_amount.mean(),
+            'top_product_last_10min': batch.products[np.argmax(np.bincount(batch.product_codes[recent]))],
+            'active_stores_last_10min': int(np.count_nonzero(np.bincount(batch.store_codes[recent]))),
+            'revenue_per_minute': recent_amount.sum() / lookback_minutes
         }
+
+def warmup():
+    """Run each kernel on tiny inputs so the first real request pays no startup cost"""
+    amount = np.ones(2)
+    codes = np.zeros(2, dtype=np.int32)
+    order = np.arange(2, dtype=np.int64)
+    _summary_sums(amount, amount)
+    _group_dense_rank(order, amount, order)
+    _customer_segments(order, codes, amount, amount, codes, codes, 1, 1, 1)
+    _lttb(np.arange(4.0), np.arange(4.0), 3)
+
+warmup()
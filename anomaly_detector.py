@@ -1,10 +1,101 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import DBSCAN
+from analytics_engine import AnalyticsEngine
+from numba import njit, prange, types
+from collections import defaultdict
+import math
 import warnings
-warnings.filterwarnings('ignore')
+
+# Kernel argument types; read-only 'A' arrays also accept writable and strided inputs
+_F8 = types.Array(types.float64, 1, 'A', readonly=True)
+_I1 = types.Array(types.int8, 1, 'A', readonly=True)
+
+@njit(types.uint8[:](_F8, _F8, _I1, types.float64, types.float64, types.float64, types.float64,
+                     types.float64, types.float64), cache=True, fastmath=True, parallel=True)
+def _stat_mask(amount, quantity, hour, amt_mean, amt_std, q1, q3, qty_mean, qty_std):
+    """Flag transactions failing any z-score, IQR or hour check in one pass"""
+    n = amount.shape[0]
+    out = np.zeros(n, dtype=np.uint8)
+    iqr = q3 - q1
+    lo = q1 - 3 * iqr  # More aggressive threshold
+    hi = q3 + 3 * iqr
+    for i in prange(n):
+        flagged = hour[i] < 6 or hour[i] > 23
+        if amt_std > 0 and abs((amount[i] - amt_mean) / amt_std) > 3:
+            flagged = True
+        if iqr > 0 and (amount[i] < lo or amount[i] > hi):
+            flagged = True
+        if qty_std > 0 and abs((quantity[i] - qty_mean) / qty_std) > 3:
+            flagged = True
+        if flagged:
+            out[i] = 1
+    return out
+
+@njit(types.float64[:](types.Array(types.float64, 2, 'A', readonly=True), types.int64),
+      cache=True, fastmath=True, parallel=True)
+def _hbos_scores(X, n_bins):
+    """Histogram-based outlier score: sum of -log bin densities over features"""
+    n, d = X.shape
+    log_density = np.empty((n, d))
+    for j in prange(d):
+        column = X[:, j]
+        lo = column.min()
+        width = (column.max() - lo) / n_bins
+        bins = np.zeros(n, dtype=np.int64)
+        if width > 0:
+            for i in range(n):
+                # Right edge is inclusive, as in np.histogram
+                bins[i] = min(int((column[i] - lo) / width), n_bins - 1)
+        hist = np.bincount(bins, minlength=n_bins)
+        for i in range(n):
+            log_density[i, j] = -np.log(hist[bins[i]] / n + 1e-9)
+    return log_density.sum(axis=1)
+
+@njit(types.float32[:, :](types.float32[:, :], _F8, _F8), cache=True, fastmath=True, parallel=True)
+def _standardize_inplace(X, mean, scale):
+    """Overwrite X with (X - mean) / scale row by row"""
+    n, d = X.shape
+    for i in prange(n):
+        for j in range(d):
+            X[i, j] = (X[i, j] - mean[j]) / scale[j]
+    return X
+
+def _observed_counts(values):
+    """value_counts as a dict, without the zero rows unobserved categories produce"""
+    counts = values.value_counts()
+    return counts[counts > 0].to_dict()
+
+class _OnlineScaler:
+    """Per-feature running mean/variance (Welford/Chan merge) with in-place standardization"""
+    
+    def __init__(self):
+        self.n = 0
+        self.mean = None
+        self.m2 = None
+    
+    def partial_update(self, X):
+        """Merge the moments of a new batch into the running state"""
+        n_b = X.shape[0]
+        mean_b = X.mean(axis=0, dtype=np.float64)
+        m2_b = ((X - mean_b) ** 2).sum(axis=0, dtype=np.float64)
+        if self.n == 0:
+            self.n, self.mean, self.m2 = n_b, mean_b, m2_b
+            return self
+        
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * n_b / n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+        return self
+    
+    def transform_inplace(self, X):
+        """Standardize X in place; constant features keep unit scale like StandardScaler"""
+        scale = np.sqrt(self.m2 / self.n)
+        scale[scale == 0] = 1.0
+        return _standardize_inplace(X, self.mean, scale)
 
 class AnomalyDetector:
     """Detect anomalies in retail transaction data"""
@@ -13,191 +104,269 @@ class AnomalyDetector:
         self.isolation_forest = IsolationForest(
             contamination=0.05,  # Expect 5% of data to be anomalous
             random_state=42,
-            n_estimators=100
+            n_estimators=100,
+            max_samples=256,  # Subsample size from the original paper bounds training cost
+            n_jobs=-1
         )
-        self.scaler = StandardScaler()
+        self.scaler = _OnlineScaler()
         self.is_fitted = False
+        self.refit_drift = 0.1  # Refit once the data size drifts by 10%
+        self._last_fit_n = 0
+        self._n_features = None
         
-    def detect_anomalies(self, data, method='isolation_forest'):
+        # Running moments for real-time scoring: per_cat holds [n, mean, m2]
+        self._state = {
+            'n': 0, 'mean_amt': 0.0, 'm2_amt': 0.0, 'mean_qty': 0.0, 'm2_qty': 0.0,
+            'per_cat': defaultdict(lambda: [0, 0.0, 0.0])
+        }
+        
+    def detect_anomalies(self, data, method='isolation_forest', return_positions=False):
         """
         Detect anomalies in transaction data
         
         Args:
             data: DataFrame with transaction data
-            method: 'isolation_forest', 'statistical', or 'combined'
+            method: 'isolation_forest', 'statistical', 'combined', or 'hbos'
+            return_positions: also return the row positions of the anomalies in data
         
         Returns:
-            DataFrame with anomalous transactions and scores
+            DataFrame with anomalous transactions and scores, plus their
+            positions as an integer array when return_positions is set
         """
+        no_anomalies = (pd.DataFrame(), np.empty(0, dtype=np.intp))
         if data.empty:
-            return pd.DataFrame()
+            return no_anomalies if return_positions else no_anomalies[0]
+        
+        # Extract column arrays and time parts once for every detection method
+        batch = AnalyticsEngine.prepare(data)
         
         # Prepare features for anomaly detection
-        features_df = self._prepare_features(data)
+        features = self._prepare_features(data, batch)
         
-        if features_df.empty:
-            return pd.DataFrame()
+        if features.shape[0] == 0:
+            return no_anomalies if return_positions else no_anomalies[0]
         
         if method == 'isolation_forest':
-            anomalies = self._isolation_forest_detection(data, features_df)
+            anomalies, positions = self._isolation_forest_detection(data, features)
         elif method == 'statistical':
-            anomalies = self._statistical_detection(data)
+            anomalies, positions = self._statistical_detection(data, batch)
+        elif method == 'hbos':
+            anomalies, positions = self._hbos_detection(data, features)
         elif method == 'combined':
-            iso_anomalies = self._isolation_forest_detection(data, features_df)
-            stat_anomalies = self._statistical_detection(data)
+            iso_positions, _ = self._isolation_forest_positions(features)
+            try:
+                stat_positions, _ = self._statistical_positions(batch)
+            except Exception as e:
+                print(f"Error in statistical detection: {e}")
+                stat_positions = np.empty(0, dtype=np.intp)
             # Combine results - transaction is anomaly if detected by either method
-            combined_indices = set(iso_anomalies.index).union(set(stat_anomalies.index))
-            anomalies = data.loc[list(combined_indices)].copy()
-            if not anomalies.empty:
+            mask = np.zeros(len(data), dtype=bool)
+            mask[iso_positions] = True
+            mask[stat_positions] = True
+            positions = np.nonzero(mask)[0]
+            if len(positions) > 0:
+                anomalies = data.iloc[positions].copy()
                 anomalies['anomaly_score'] = 0.8  # Combined detection score
+            else:
+                anomalies = pd.DataFrame()
         else:
-            raise ValueError("Method must be 'isolation_forest', 'statistical', or 'combined'")
+            raise ValueError("Method must be 'isolation_forest', 'statistical', 'combined', or 'hbos'")
         
-        return anomalies
+        return (anomalies, positions) if return_positions else anomalies
     
-    def _prepare_features(self, data):
-        """Prepare numerical features for anomaly detection"""
+    def _prepare_features(self, data, batch=None):
+        """Prepare a float32 feature matrix for anomaly detection"""
         try:
-            data = data.copy()
-            
-            # Convert timestamp to numerical features
-            data['timestamp'] = pd.to_datetime(data['timestamp'])
-            data['hour'] = data['timestamp'].dt.hour
-            data['day_of_week'] = data['timestamp'].dt.dayofweek
-            data['minute'] = data['timestamp'].dt.minute
-            
-            # Encode categorical variables
-            category_encoded = pd.get_dummies(data['category'], prefix='cat')
-            store_encoded = pd.get_dummies(data['store_id'], prefix='store')
-            payment_encoded = pd.get_dummies(data['payment_method'], prefix='pay')
-            
-            # Select numerical features
-            numerical_features = [
-                'total_amount', 'quantity', 'unit_price', 
-                'subtotal', 'tax_amount', 'hour', 'day_of_week', 'minute'
-            ]
-            
-            # Combine all features
-            features = data[numerical_features].copy()
-            
-            # Add encoded categorical features (limit to prevent too many features)
-            if category_encoded.shape[1] <= 10:
-                features = pd.concat([features, category_encoded], axis=1)
-            if store_encoded.shape[1] <= 20:
-                features = pd.concat([features, store_encoded], axis=1)
-            if payment_encoded.shape[1] <= 10:
-                features = pd.concat([features, payment_encoded], axis=1)
-            
-            # Remove any infinite or NaN values
-            features = features.replace([np.inf, -np.inf], np.nan)
-            features = features.fillna(features.median())
+            if batch is None:
+                batch = AnalyticsEngine.prepare(data)
+            
+            n = len(batch)
+            numerical_columns = [batch.amount, batch.quantity, batch.unit_price] + [
+                data[col].to_numpy(dtype=np.float32) for col in ('subtotal', 'tax_amount')
+            ] + [batch.hour, batch.dow, batch.minute]
+            
+            # Sorted batch codes give the same column order as get_dummies
+            encoded = []
+            for codes, uniques, limit in ((batch.category_codes, batch.categories, 10),
+                                          (batch.store_codes, batch.stores, 20),
+                                          (batch.payment_codes, batch.payments, 10)):
+                # Limit to prevent too many features
+                if len(uniques) <= limit:
+                    encoded.append((codes, len(uniques)))
+            
+            n_features = len(numerical_columns) + sum(width for _, width in encoded)
+            features = np.empty((n, n_features), dtype=np.float32)
+            for k, values in enumerate(numerical_columns):
+                features[:, k] = values
+            
+            # One-hot blocks filled by scatter writes
+            rows = np.arange(n)
+            base = len(numerical_columns)
+            for codes, width in encoded:
+                features[:, base:base + width] = 0
+                features[rows, base + codes] = 1.0
+                base += width
+            
+            # Replace any infinite or NaN values with the column median
+            invalid = ~np.isfinite(features)
+            if invalid.any():
+                features[invalid] = np.nan
+                medians = np.nanmedian(features, axis=0)
+                features[invalid] = np.take(medians, np.nonzero(invalid)[1])
             
             return features
             
         except Exception as e:
             print(f"Error in feature preparation: {e}")
-            return pd.DataFrame()
+            return np.empty((0, 0), dtype=np.float32)
     
-    def _isolation_forest_detection(self, data, features_df):
-        """Detect anomalies using Isolation Forest"""
+    def _isolation_forest_positions(self, features):
+        """Return row positions and decision scores of Isolation Forest outliers"""
         try:
-            if len(features_df) < 10:  # Need minimum samples
-                return pd.DataFrame()
-            
-            # Scale features
-            features_scaled = self.scaler.fit_transform(features_df)
+            if len(features) < 10:  # Need minimum samples
+                return np.empty(0, dtype=np.intp), np.empty(0)
+            
+            n = len(features)
+            needs_fit = (
+                not self.is_fitted
+                or features.shape[1] != self._n_features
+                or abs(n - self._last_fit_n) / self._last_fit_n >= self.refit_drift
+            )
+            
+            if needs_fit:
+                # Feature layout changed (e.g. new one-hot columns): restart the scaler
+                if features.shape[1] != self._n_features:
+                    self.scaler = _OnlineScaler()
+                self.scaler.partial_update(features)
+            
+            # Standardize in place; the feature matrix is not reused after this
+            features_scaled = self.scaler.transform_inplace(features)
+            
+            if needs_fit:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    self.isolation_forest.fit(features_scaled)
+                self.is_fitted = True
+                self._last_fit_n = n
+                self._n_features = features.shape[1]
             
-            # Fit and predict
-            anomaly_labels = self.isolation_forest.fit_predict(features_scaled)
             anomaly_scores = self.isolation_forest.decision_function(features_scaled)
             
-            # Get anomalous transactions (label = -1)
-            anomaly_indices = np.where(anomaly_labels == -1)[0]
+            # Negative decision = outlier
+            anomaly_indices = np.where(anomaly_scores < 0)[0]
+            return anomaly_indices, anomaly_scores[anomaly_indices]
+            
+        except Exception as e:
+            print(f"Error in isolation forest detection: {e}")
+            return np.empty(0, dtype=np.intp), np.empty(0)
+    
+    def _isolation_forest_detection(self, data, features):
+        """Detect anomalies using Isolation Forest; returns the frame and its row positions"""
+        anomaly_indices, anomaly_scores = self._isolation_forest_positions(features)
+        
+        if len(anomaly_indices) == 0:
+            return pd.DataFrame(), anomaly_indices
+        
+        # Sort by anomaly score (higher scores are more anomalous)
+        anomaly_scores = np.abs(anomaly_scores)
+        order = np.argsort(-anomaly_scores, kind='stable')
+        anomaly_indices = anomaly_indices[order]
+        
+        anomalies = data.iloc[anomaly_indices].copy()
+        anomalies['anomaly_score'] = anomaly_scores[order]
+        return anomalies, anomaly_indices
+    
+    def _hbos_detection(self, data, features, n_bins=20, percentile=95):
+        """Detect anomalies with histogram-based outlier scores (streaming-friendly)"""
+        no_anomalies = (pd.DataFrame(), np.empty(0, dtype=np.intp))
+        try:
+            if len(features) < 10:  # Need minimum samples
+                return no_anomalies
+            
+            scores = _hbos_scores(np.ascontiguousarray(features, dtype=np.float64), n_bins)
+            threshold = np.percentile(scores, percentile)
+            anomaly_indices = np.where(scores > threshold)[0]
             
             if len(anomaly_indices) == 0:
-                return pd.DataFrame()
+                return no_anomalies
             
+            anomaly_indices = anomaly_indices[np.argsort(-scores[anomaly_indices], kind='stable')]
             anomalies = data.iloc[anomaly_indices].copy()
-            anomalies['anomaly_score'] = np.abs(anomaly_scores[anomaly_indices])
-            
-            # Sort by anomaly score (higher scores are more anomalous)
-            anomalies = anomalies.sort_values('anomaly_score', ascending=False)
+            anomalies['anomaly_score'] = scores[anomaly_indices]
             
-            return anomalies
+            return anomalies, anomaly_indices
             
         except Exception as e:
-            print(f"Error in isolation forest detection: {e}")
-            return pd.DataFrame()
+            print(f"Error in HBOS detection: {e}")
+            return no_anomalies
     
-    def _statistical_detection(self, data):
+    def _statistical_positions(self, batch):
+        """Return row positions flagged by the statistical rules plus the moments used"""
+        amount = batch.amount
+        quantity = batch.quantity
+        if len(amount) == 0:
+            return np.empty(0, dtype=np.intp), {}
+        
+        # Z-score and IQR parameters for amounts, z-score for quantities
+        moments = {
+            'amount': amount,
+            'amount_mean': amount.mean(),
+            'amount_std': amount.std(ddof=1) if len(amount) > 1 else 0.0,
+            'quantity': quantity,
+            'quantity_mean': quantity.mean(),
+            'quantity_std': quantity.std(ddof=1) if len(quantity) > 1 else 0.0
+        }
+        # Quartiles as order statistics (quantile method='lower') from one O(n) partition
+        n = len(amount)
+        k1, k3 = (n - 1) // 4, 3 * (n - 1) // 4
+        part = np.partition(amount, (k1, k3))
+        Q1, Q3 = part[k1], part[k3]
+        
+        # Single fused pass; outside 6 AM - 11 PM also counts as anomalous
+        mask = _stat_mask(amount, quantity, batch.hour, moments['amount_mean'], moments['amount_std'],
+                          Q1, Q3, moments['quantity_mean'], moments['quantity_std'])
+        return np.nonzero(mask)[0], moments
+    
+    def _statistical_detection(self, data, batch=None):
         """Detect anomalies using statistical methods"""
+        no_anomalies = (pd.DataFrame(), np.empty(0, dtype=np.intp))
         try:
-            anomalies_list = []
-            data = data.copy()
+            if batch is None:
+                batch = AnalyticsEngine.prepare(data)
             
-            # Z-score method for transaction amounts
-            amount_mean = data['total_amount'].mean()
-            amount_std = data['total_amount'].std()
+            anomaly_positions, moments = self._statistical_positions(batch)
             
-            if amount_std > 0:
-                data['amount_zscore'] = np.abs((data['total_amount'] - amount_mean) / amount_std)
-                amount_anomalies = data[data['amount_zscore'] > 3]  # 3 standard deviations
-                if not amount_anomalies.empty:
-                    anomalies_list.append(amount_anomalies.index)
-            
-            # IQR method for transaction amounts
-            Q1 = data['total_amount'].quantile(0.25)
-            Q3 = data['total_amount'].quantile(0.75)
-            IQR = Q3 - Q1
-            
-            if IQR > 0:
-                lower_bound = Q1 - 3 * IQR  # More aggressive threshold
-                upper_bound = Q3 + 3 * IQR
-                
-                iqr_anomalies = data[
-                    (data['total_amount'] < lower_bound) | 
-                    (data['total_amount'] > upper_bound)
-                ]
-                if not iqr_anomalies.empty:
-                    anomalies_list.append(iqr_anomalies.index)
+            if len(anomaly_positions) == 0:
+                return no_anomalies
             
-            # Quantity-based anomalies
-            quantity_mean = data['quantity'].mean()
-            quantity_std = data['quantity'].std()
+            amount_std = moments['amount_std']
+            quantity_std = moments['quantity_std']
             
+            # Most extreme amounts first; the composite score below is the amount z-score
+            if amount_std > 0:
+                amount_z = np.abs(moments['amount'][anomaly_positions] - moments['amount_mean'])
+                anomaly_positions = anomaly_positions[np.argsort(-amount_z, kind='stable')]
+            
+            anomalies = data.iloc[anomaly_positions].copy()
+            if not pd.api.types.is_datetime64_any_dtype(anomalies['timestamp']):
+                anomalies['timestamp'] = batch.ts_ns[anomaly_positions].view('datetime64[ns]')
+            if amount_std > 0:
+                anomalies['amount_zscore'] = np.abs((moments['amount'][anomaly_positions] - moments['amount_mean']) / amount_std)
             if quantity_std > 0:
-                data['quantity_zscore'] = np.abs((data['quantity'] - quantity_mean) / quantity_std)
-                quantity_anomalies = data[data['quantity_zscore'] > 3]
-                if not quantity_anomalies.empty:
-                    anomalies_list.append(quantity_anomalies.index)
-            
-            # Time-based anomalies (transactions at unusual hours)
-            data['timestamp'] = pd.to_datetime(data['timestamp'])
-            data['hour'] = data['timestamp'].dt.hour
-            
-            # Consider transactions outside 6 AM - 11 PM as potentially anomalous
-            time_anomalies = data[(data['hour'] < 6) | (data['hour'] > 23)]
-            if not time_anomalies.empty:
-                anomalies_list.append(time_anomalies.index)
-            
-            # Combine all anomaly indices
-            if anomalies_list:
-                all_anomaly_indices = set().union(*anomalies_list)
-                anomalies = data.loc[list(all_anomaly_indices)].copy()
-                
-                # Calculate composite anomaly score
-                if 'amount_zscore' in anomalies.columns:
-                    anomalies['anomaly_score'] = anomalies['amount_zscore']
-                else:
-                    anomalies['anomaly_score'] = 1.0
-                
-                return anomalies.sort_values('anomaly_score', ascending=False)
+                anomalies['quantity_zscore'] = np.abs((moments['quantity'][anomaly_positions] - moments['quantity_mean']) / quantity_std)
+            anomalies['hour'] = batch.hour[anomaly_positions]
+            
+            # Calculate composite anomaly score
+            if 'amount_zscore' in anomalies.columns:
+                anomalies['anomaly_score'] = anomalies['amount_zscore']
             else:
-                return pd.DataFrame()
+                anomalies['anomaly_score'] = 1.0
+            
+            return anomalies, anomaly_positions
                 
         except Exception as e:
             print(f"Error in statistical detection: {e}")
-            return pd.DataFrame()
+            return no_anomalies
     
     def get_anomaly_summary(self, data):
         """Get summary of anomaly detection results"""
@@ -224,24 +393,68 @@ class AnomalyDetector:
             'total_anomalous_revenue': anomalies['total_amount'].sum(),
             'avg_anomaly_amount': anomalies['total_amount'].mean(),
             'max_anomaly_amount': anomalies['total_amount'].max(),
-            'anomaly_categories': anomalies['category'].value_counts().to_dict(),
-            'anomaly_stores': anomalies['store_id'].value_counts().to_dict(),
+            'anomaly_categories': _observed_counts(anomalies['category']),
+            'anomaly_stores': _observed_counts(anomalies['store_id']),
             'anomaly_hours': anomalies['timestamp'].dt.hour.value_counts().to_dict() if 'timestamp' in anomalies.columns else {}
         }
     
-    def detect_real_time_anomalies(self, new_transaction, historical_data, threshold_std=2):
+    def ingest(self, transactions):
+        """Update the running moments with new transactions (dict, Series or DataFrame)"""
+        if isinstance(transactions, pd.DataFrame):
+            rows = zip(transactions['total_amount'], transactions['quantity'], transactions['category'])
+        else:
+            rows = [(transactions['total_amount'], transactions['quantity'], transactions['category'])]
+        
+        state = self._state
+        for amount, quantity, category in rows:
+            # Welford update for amount and quantity
+            state['n'] += 1
+            n = state['n']
+            delta = amount - state['mean_amt']
+            state['mean_amt'] += delta / n
+            state['m2_amt'] += delta * (amount - state['mean_amt'])
+            delta = quantity - state['mean_qty']
+            state['mean_qty'] += delta / n
+            state['m2_qty'] += delta * (quantity - state['mean_qty'])
+            
+            cat = state['per_cat'][category]
+            cat[0] += 1
+            delta = amount - cat[1]
+            cat[1] += delta / cat[0]
+            cat[2] += delta * (amount - cat[1])
+    
+    def _online_moments(self, category):
+        """Return (amount mean/std, quantity mean/std, category mean/std or None) from the running state"""
+        state = self._state
+        n = state['n']
+        amount_std = math.sqrt(state['m2_amt'] / (n - 1)) if n > 1 else float('nan')
+        quantity_std = math.sqrt(state['m2_qty'] / (n - 1)) if n > 1 else float('nan')
+        
+        category_moments = None
+        if category in state['per_cat']:
+            cat_n, cat_mean, cat_m2 = state['per_cat'][category]
+            cat_std = math.sqrt(cat_m2 / (cat_n - 1)) if cat_n > 1 else float('nan')
+            category_moments = (cat_mean, cat_std)
+        
+        return (state['mean_amt'], amount_std), (state['mean_qty'], quantity_std), category_moments
+    
+    def detect_real_time_anomalies(self, new_transaction, historical_data=None, threshold_std=2):
         """
         Detect if a new transaction is anomalous based on historical data
         
         Args:
             new_transaction: Single transaction (dict or Series)
-            historical_data: Historical transaction data (DataFrame)
+            historical_data: Historical transaction data (DataFrame); if None the
+                running statistics accumulated by ingest() are used instead
             threshold_std: Standard deviation threshold for anomaly detection
         
         Returns:
             dict with anomaly status and details
         """
-        if historical_data.empty:
+        if historical_data is None:
+            if self._state['n'] == 0:
+                return {'is_anomaly': False, 'reason': 'No historical data'}
+        elif historical_data.empty:
             return {'is_anomaly': False, 'reason': 'No historical data'}
         
         try:
@@ -255,29 +468,32 @@ class AnomalyDetector:
                 quantity = new_transaction['quantity']
                 category = new_transaction['category']
             
-            # Check amount anomaly
-            hist_amounts = historical_data['total_amount']
-            amount_mean = hist_amounts.mean()
-            amount_std = hist_amounts.std()
+            if historical_data is None:
+                (amount_mean, amount_std), (quantity_mean, quantity_std), category_moments = self._online_moments(category)
+            else:
+                hist_amounts = historical_data['total_amount']
+                amount_mean, amount_std = hist_amounts.mean(), hist_amounts.std()
+                hist_quantities = historical_data['quantity']
+                quantity_mean, quantity_std = hist_quantities.mean(), hist_quantities.std()
+                
+                category_data = historical_data[historical_data['category'] == category]
+                category_moments = None
+                if not category_data.empty:
+                    cat_amounts = category_data['total_amount']
+                    category_moments = (cat_amounts.mean(), cat_amounts.std())
             
+            # Check amount anomaly
             amount_zscore = abs((amount - amount_mean) / amount_std) if amount_std > 0 else 0
             
             # Check quantity anomaly
-            hist_quantities = historical_data['quantity']
-            quantity_mean = hist_quantities.mean()
-            quantity_std = hist_quantities.std()
-            
             quantity_zscore = abs((quantity - quantity_mean) / quantity_std) if quantity_std > 0 else 0
             
             # Check category-specific anomaly
-            category_data = historical_data[historical_data['category'] == category]
             category_anomaly = False
             category_zscore = 0
             
-            if not category_data.empty:
-                cat_amounts = category_data['total_amount']
-                cat_mean = cat_amounts.mean()
-                cat_std = cat_amounts.std()
+            if category_moments is not None:
+                cat_mean, cat_std = category_moments
                 category_zscore = abs((amount - cat_mean) / cat_std) if cat_std > 0 else 0
                 category_anomaly = category_zscore > threshold_std
             
@@ -306,3 +522,12 @@ class AnomalyDetector:
             
         except Exception as e:
             return {'is_anomaly': False, 'reason': f'Error in detection: {str(e)}'}
+
+def warmup():
+    """Run each kernel on tiny inputs so the first real request pays no startup cost"""
+    values = np.ones(2)
+    _stat_mask(values, values, np.zeros(2, dtype=np.int8), 1.0, 1.0, 0.0, 2.0, 1.0, 1.0)
+    _hbos_scores(np.ones((2, 2)), 2)
+    _standardize_inplace(np.ones((2, 2), dtype=np.float32), values, values)
+
+warmup()
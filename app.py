@@ -1,23 +1,23 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import plotly.io as pio
 import numpy as np
+import re
 from datetime import datetime, timedelta
-import time
-import threading
-from PIL import Image
-import seaborn as sns
-import matplotlib.pyplot as plt
-from data_generator import RetailDataGenerator
-from analytics_engine import AnalyticsEngine
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from data_generator import RetailDataGenerator, TransactionRingBuffer
+from analytics_engine import AnalyticsEngine, lttb_indices
 from anomaly_detector import AnomalyDetector
 from customer_segmentation import CustomerSegmentation
 from predictive_analytics import PredictiveAnalytics
 from report_generator import ReportGenerator
 from image_generator import ImageGenerator
 
+# Serialize figures with orjson for every st.plotly_chart call
+pio.json.config.default_engine = 'orjson'
+
 # Configure page
 st.set_page_config(
     page_title="Advanced Retail Analytics Platform",
@@ -27,7 +27,7 @@ st.set_page_config(
 )
 
 # Custom CSS for modern UI with blue-green-black theme and animations
-st.markdown("""
+_CSS = """
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
     
@@ -327,49 +327,320 @@ st.markdown("""
         50% { transform: translateY(-20px); }
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_data
+def _css():
+    """Page stylesheet with whitespace collapsed, built once per process"""
+    css = re.sub(r'\s+', ' ', _CSS)
+    return re.sub(r'\s*([{};,>])\s*', r'\1', css).strip()
+
+st.markdown(_css(), unsafe_allow_html=True)
+
+@st.cache_resource
+def get_engines():
+    """Stateless helpers shared by all sessions; stateful models stay in session state"""
+    return SimpleNamespace(
+        reports=ReportGenerator(),
+        images=ImageGenerator()
+    )
+
+@st.cache_data
+def _hero_image():
+    """Dashboard hero image, rendered once per process"""
+    return get_engines().images.create_dashboard_hero_image()
+
+@st.cache_data
+def _feature_icons():
+    """Feature icons, rendered once per process"""
+    return get_engines().images.create_feature_icons()
 
 # Initialize session state
 if 'data_generator' not in st.session_state:
     st.session_state.data_generator = RetailDataGenerator()
     st.session_state.analytics_engine = AnalyticsEngine()
-    st.session_state.anomaly_detector = AnomalyDetector()
-    st.session_state.customer_segmentation = CustomerSegmentation()
+    st.session_state.anomaly_detector = AnomalyDetector()  # used only by this session's anomaly jobs
     st.session_state.predictive_analytics = PredictiveAnalytics()
-    st.session_state.report_generator = ReportGenerator()
-    st.session_state.image_generator = ImageGenerator()
+    st.session_state.sales_buffer = TransactionRingBuffer(1000, st.session_state.data_generator.column_dtypes)  # keep only last 1000 records
+    st.session_state.sales_version = 0
+    st.session_state.minute_agg = {}  # minute -> [revenue, records]
     st.session_state.sales_data = pd.DataFrame()
+    st.session_state.sales_data_version = 0
+    st.session_state.time_bounds = None
     st.session_state.is_streaming = False
     st.session_state.last_update = datetime.now()
     st.session_state.current_page = "Home"
     st.session_state.generated_report = ""
+    st.session_state.anomaly_job = None  # (fingerprint, future) while detection runs
+    st.session_state.last_anomalies = None  # (fingerprint, data, anomalies, positions)
+
+# Cached computations, keyed on a cheap fingerprint instead of hashing the frame
+@st.cache_data(ttl="30s", max_entries=32)
+def _cached_metrics(fingerprint, _data):
+    """Cached analytics metrics for a data fingerprint"""
+    return AnalyticsEngine().calculate_metrics(_data)
+
+@st.cache_data(ttl="30s", max_entries=32)
+def _cached_segments(fingerprint, _data, n_clusters=4):
+    """Cached customer segmentation for a data fingerprint"""
+    return CustomerSegmentation().segment_customers(_data, n_clusters=n_clusters)
+
+@st.cache_data(ttl="30s", max_entries=32)
+def _cached_clv(fingerprint, _data):
+    """Cached customer lifetime value table for a data fingerprint"""
+    return CustomerSegmentation().get_customer_lifetime_value(_data)
+
+@st.cache_data(ttl="30s", max_entries=32)
+def _cached_predictions(fingerprint, _data):
+    """Cached sales and demand forecast metrics for a data fingerprint"""
+    predictive = PredictiveAnalytics()
+    _, forecast_metrics = predictive.forecast_sales(_data)
+    _, demand_metrics = predictive.demand_forecasting(_data)
+    return {'sales_forecast': forecast_metrics, 'demand_forecast': demand_metrics}
+
+@st.cache_data(ttl="30s", max_entries=32)
+def _cached_seasonal(fingerprint, _data):
+    """Cached hourly, daily and per-category seasonal patterns for a data fingerprint"""
+    return PredictiveAnalytics().seasonal_analysis(_data)
+
+@st.cache_data(ttl="30s", max_entries=32)
+def _cached_report(fingerprint, kind, _data):
+    """Cached 'executive', 'customer' or 'predictive' report, built from the cached analytics above"""
+    analytics_results = _cached_metrics(fingerprint, _data)
+    customer_segments = None
+    predictions = None
+    if kind == 'customer':
+        _, segment_stats = _cached_segments(fingerprint, _data)
+        customer_segments = {'segment_stats': segment_stats}
+    elif kind == 'predictive':
+        predictions = _cached_predictions(fingerprint, _data)
+    return get_engines().reports.generate_comprehensive_report(
+        _data, analytics_results, customer_segments, predictions
+    )
+
+@st.cache_resource
+def _anomaly_executor():
+    """Background worker that keeps anomaly detection off the render path"""
+    return ThreadPoolExecutor(max_workers=1)
+
+def _detect_anomalies(detector, data):
+    """Anomaly detection job for the background worker; touches no session state"""
+    # The session's detector keeps its fitted model and refits only on drift; a session has at most
+    # one job in flight and the executor has one worker, so the detector is never used concurrently
+    anomalies, positions = detector.detect_anomalies(data, return_positions=True)
+    return data, anomalies, positions
+
+def _latest_anomalies(fingerprint, data):
+    """Newest finished anomaly result and whether it is stale, scheduling a refresh if needed"""
+    job = st.session_state.anomaly_job
+    if job is not None and job[1].done():
+        st.session_state.last_anomalies = (job[0], *job[1].result())
+        st.session_state.anomaly_job = job = None
+    
+    last = st.session_state.last_anomalies
+    if last is not None and last[0] == fingerprint:
+        return last[1:], False
+    
+    if job is None:
+        job = (fingerprint, _anomaly_executor().submit(_detect_anomalies, st.session_state.anomaly_detector, data))
+        st.session_state.anomaly_job = job
+    if last is None:
+        # Nothing to show yet, so wait for the first result
+        with st.spinner("🔍 Detecting anomalies..."):
+            last = (job[0], *job[1].result())
+        st.session_state.last_anomalies = last
+        st.session_state.anomaly_job = None
+    return last[1:], last[0] != fingerprint
+
+def _data_fingerprint(data):
+    """Identify a data snapshot by its size and newest record"""
+    if data.empty:
+        return (0, None)
+    return (len(data), data['timestamp'].iloc[-1])
 
 def generate_data_batch():
     """Generate a batch of new sales data"""
-    batch_data = st.session_state.data_generator.generate_batch(batch_size=10)
+    batch = st.session_state.data_generator.generate_batch(batch_size=10, as_arrays=True)
     
-    # Append to existing data
-    if not st.session_state.sales_data.empty:
-        st.session_state.sales_data = pd.concat([st.session_state.sales_data, batch_data], ignore_index=True)
-    else:
-        st.session_state.sales_data = batch_data
+    # Write into the ring buffer; the oldest records are overwritten
+    evicted = st.session_state.sales_buffer.append(batch)
     
-    # Keep only last 1000 records for performance
-    if len(st.session_state.sales_data) > 1000:
-        st.session_state.sales_data = st.session_state.sales_data.tail(1000).reset_index(drop=True)
+    # Roll the per-minute revenue forward: add the batch, remove what the buffer evicted
+    _roll_minutes(batch, 1)
+    _roll_minutes(evicted, -1)
     
+    st.session_state.sales_version += 1
     st.session_state.last_update = datetime.now()
 
-def stream_data():
-    """Simulate real-time data streaming"""
-    import streamlit as st
-    try:
-        while getattr(st.session_state, 'is_streaming', False):
-            generate_data_batch()
-            time.sleep(2)
-    except Exception:
-        # Handle session state access issues in threading
-        pass
+def _roll_minutes(columns, sign):
+    """Add (sign=1) or remove (sign=-1) rows from the per-minute revenue aggregation"""
+    if len(columns['timestamp']) == 0:
+        return
+    minute_agg = st.session_state.minute_agg
+    minute_keys = columns['timestamp'].astype('datetime64[m]').astype('datetime64[ns]')
+    minutes, inverse = np.unique(minute_keys, return_inverse=True)
+    revenue = np.bincount(inverse, weights=columns['total_amount'])
+    records = np.bincount(inverse)
+    for minute, minute_revenue, minute_records in zip(minutes, revenue, records):
+        bucket = minute_agg.setdefault(minute, [0.0, 0])
+        bucket[0] += sign * minute_revenue
+        bucket[1] += sign * int(minute_records)
+        if bucket[1] == 0:
+            del minute_agg[minute]
+
+def _sales_data():
+    """Materialize the ring buffer as a DataFrame, rebuilt only after new batches"""
+    if st.session_state.sales_data_version != st.session_state.sales_version:
+        columns = st.session_state.sales_buffer.ordered()
+        st.session_state.sales_data = st.session_state.data_generator.to_frame(columns)
+        
+        # Batches overlap in time, so the bounds are not simply the first and last rows
+        timestamps = columns['timestamp']
+        st.session_state.time_bounds = (
+            (pd.Timestamp(timestamps.min()), pd.Timestamp(timestamps.max()))
+            if len(timestamps) else None
+        )
+        st.session_state.sales_data_version = st.session_state.sales_version
+    return st.session_state.sales_data
+
+def _minute_sales():
+    """Per-minute revenue of the whole buffer from the running aggregation"""
+    minute_agg = st.session_state.minute_agg
+    minute_sales = pd.DataFrame({
+        'minute': list(minute_agg),
+        'total_amount': [bucket[0] for bucket in minute_agg.values()]
+    })
+    return minute_sales.sort_values('minute', ignore_index=True)
+
+def _downsample(data, x, y, n_out=500):
+    """Reduce a frame to about n_out rows ordered by x with LTTB, keeping the visual shape"""
+    if len(data) <= n_out:
+        return data
+    xs = data[x].to_numpy(dtype='datetime64[ns]').view('i8')
+    order = np.argsort(xs, kind='stable')
+    return data.iloc[order[lttb_indices(xs[order], data[y].to_numpy()[order], n_out)]]
+
+def _apply_filters(data, filters, follow_live=False):
+    """Apply the dashboard filters; a live view leaves the time range open-ended"""
+    selected_categories, selected_stores, time_range = filters
+    
+    # Cheap time-window mask first so the isin lookups run on fewer rows
+    timestamps = data['timestamp'].to_numpy()
+    mask = timestamps >= np.datetime64(time_range[0])
+    if not follow_live:
+        mask &= timestamps <= np.datetime64(time_range[1])
+    data = data.iloc[mask]
+    return data[data['category'].isin(selected_categories) & data['store_id'].isin(selected_stores)]
+
+def _live_overview(filtered_data, analytics_results, filters, kpi_placeholder, trend_placeholder):
+    """Fill the KPI and trend placeholders, pulling a new batch on each streaming tick"""
+    if st.session_state.is_streaming:
+        generate_data_batch()
+        filtered_data = _apply_filters(_sales_data(), filters, follow_live=True)
+        if filtered_data.empty:
+            return
+        analytics_results = st.session_state.analytics_engine.format_for_display(
+            _cached_metrics(_data_fingerprint(filtered_data) + filters, filtered_data)
+        )
+    
+    # Headline numbers come straight from the metrics already computed for this view
+    summary = analytics_results['summary_stats']
+    
+    with kpi_placeholder.container():
+        kpi_col1, kpi_col2, kpi_col3, kpi_col4, kpi_col5 = st.columns(5)
+        
+        with kpi_col1:
+            st.metric("💰 Total Revenue", f"${summary['total_revenue']:,.2f}")
+        
+        with kpi_col2:
+            st.metric("🛒 Transactions", f"{summary['total_transactions']:,}")
+        
+        with kpi_col3:
+            st.metric("📊 Avg. Transaction", f"${summary['average_transaction_value']:.2f}")
+        
+        with kpi_col4:
+            st.metric("👥 Unique Customers", f"{summary['unique_customers']:,}")
+        
+        with kpi_col5:
+            st.metric("📦 Products Sold", f"{summary['unique_products']}")
+    
+    # Group by minute for trend analysis
+    if len(filtered_data) == len(_sales_data()):
+        # Nothing is filtered out, so the running aggregation applies as-is
+        minute_sales = _minute_sales()
+    else:
+        minute_sales = (filtered_data.groupby(filtered_data['timestamp'].dt.floor('min'))['total_amount']
+                        .sum().rename_axis('minute').reset_index())
+    
+    if len(minute_sales) > 0:
+        trend_points = _downsample(minute_sales, 'minute', 'total_amount')
+        fig_trend = go.Figure(go.Scattergl(
+            x=trend_points['minute'],
+            y=trend_points['total_amount'],
+            mode='lines',
+            line=dict(color='#667eea', width=3)
+        ))
+        fig_trend.update_layout(
+            title="Revenue Trend (Per Minute)",
+            xaxis_title="Time",
+            yaxis_title="Revenue ($)",
+            height=400,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        trend_placeholder.plotly_chart(fig_trend, use_container_width=True)
+
+def _anomaly_section(fingerprint, filtered_data):
+    """Render the latest anomaly result, which may trail the filtered data by one refresh"""
+    (data, anomalies, anomaly_positions), stale = _latest_anomalies(fingerprint, filtered_data)
+    if stale:
+        st.caption("⏳ Showing the previous detection while new data is analyzed...")
+    
+    if not anomalies.empty:
+        st.warning(f"⚠️ {len(anomalies)} anomalies detected in recent transactions!")
+        
+        # Anomaly visualization
+        fig_anomalies = go.Figure()
+        
+        # Normal transactions
+        normal_mask = np.ones(len(data), dtype=bool)
+        normal_mask[anomaly_positions] = False
+        normal_data = _downsample(data.iloc[normal_mask], 'timestamp', 'total_amount')
+        fig_anomalies.add_trace(go.Scattergl(
+            x=normal_data['timestamp'],
+            y=normal_data['total_amount'],
+            mode='markers',
+            name='Normal Transactions',
+            marker=dict(color='#3498db', size=6, opacity=0.7)
+        ))
+        
+        # Anomalous transactions
+        fig_anomalies.add_trace(go.Scattergl(
+            x=anomalies['timestamp'],
+            y=anomalies['total_amount'],
+            mode='markers',
+            name='Anomalies',
+            marker=dict(color='#e74c3c', size=12, symbol='x', line=dict(color='white', width=1))
+        ))
+        
+        fig_anomalies.update_layout(
+            title="Transaction Anomalies Detection",
+            xaxis_title="Time",
+            yaxis_title="Transaction Amount ($)",
+            height=400,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        st.plotly_chart(fig_anomalies, use_container_width=True)
+        
+        # Anomaly details
+        with st.expander("📋 Anomaly Details"):
+            st.dataframe(
+                anomalies[['timestamp', 'product_name', 'total_amount', 'anomaly_score']].round(3),
+                use_container_width=True
+            )
+    else:
+        st.success("✅ No anomalies detected in current data.")
 
 def show_homepage():
     """Display the attractive homepage"""
@@ -388,10 +659,10 @@ def show_homepage():
     """, unsafe_allow_html=True)
     
     # Generate and display hero image
-    hero_image = st.session_state.image_generator.create_dashboard_hero_image()
+    hero_image = _hero_image()
     st.markdown(f"""
     <div style="text-align: center; margin: 2rem 0;">
-        <img src="data:image/png;base64,{hero_image}" style="max-width: 100%; border-radius: 15px; box-shadow: 0 8px 25px rgba(0,0,0,0.15);">
+        <img src="data:image/jpeg;base64,{hero_image}" style="max-width: 100%; border-radius: 15px; box-shadow: 0 8px 25px rgba(0,0,0,0.15);">
     </div>
     """, unsafe_allow_html=True)
     
@@ -399,7 +670,7 @@ def show_homepage():
     st.markdown("## 🎯 Platform Capabilities")
     
     # Generate feature icons
-    icons = st.session_state.image_generator.create_feature_icons()
+    icons = _feature_icons()
     
     col1, col2, col3 = st.columns(3)
     
@@ -502,15 +773,8 @@ def show_homepage():
     
     with col3:
         if st.button("🔄 Start Live Demo", key="home_stream", help="Start real-time data streaming"):
-            try:
-                st.session_state.is_streaming = True
-                # Use a more robust threading approach
-                if not hasattr(st.session_state, 'streaming_thread') or not st.session_state.streaming_thread.is_alive():
-                    st.session_state.streaming_thread = threading.Thread(target=stream_data, daemon=True)
-                    st.session_state.streaming_thread.start()
-                st.success("🟢 Live demo started! Data is streaming...")
-            except Exception as e:
-                st.error(f"Error starting stream: {str(e)}")
+            st.session_state.is_streaming = True
+            st.success("🟢 Live demo started! Data streams on the Dashboard...")
     
     # Platform Statistics
     st.markdown("## 📊 Platform Overview")
@@ -518,7 +782,7 @@ def show_homepage():
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        st.metric("📈 Data Points", f"{len(st.session_state.sales_data):,}", 
+        st.metric("📈 Data Points", f"{len(_sales_data()):,}", 
                  delta="Real-time" if st.session_state.is_streaming else "Static")
     
     with col2:
@@ -536,7 +800,7 @@ def show_homepage():
 def show_dashboard():
     """Display the main analytics dashboard"""
     # Generate sample data if empty
-    if st.session_state.sales_data.empty:
+    if _sales_data().empty:
         st.info("📊 No data available. Generate some sample data to start exploring!")
         if st.button("🎲 Generate Sample Data"):
             for _ in range(3):  # Generate multiple batches for better analysis
@@ -545,7 +809,7 @@ def show_dashboard():
             st.rerun()
         return
     
-    filtered_data = st.session_state.sales_data
+    filtered_data = _sales_data()
     
     # Data filtering options in sidebar
     with st.sidebar:
@@ -557,19 +821,14 @@ def show_dashboard():
         streaming_col1, streaming_col2 = st.columns(2)
         with streaming_col1:
             if st.button("▶️ Start", disabled=st.session_state.is_streaming):
-                try:
-                    st.session_state.is_streaming = True
-                    if not hasattr(st.session_state, 'streaming_thread') or not st.session_state.streaming_thread.is_alive():
-                        st.session_state.streaming_thread = threading.Thread(target=stream_data, daemon=True)
-                        st.session_state.streaming_thread.start()
-                    st.success("Started!")
-                except Exception as e:
-                    st.error(f"Error: {str(e)}")
+                # Rerun so the live section picks up its refresh interval
+                st.session_state.is_streaming = True
+                st.rerun()
         
         with streaming_col2:
             if st.button("⏹️ Stop", disabled=not st.session_state.is_streaming):
                 st.session_state.is_streaming = False
-                st.success("Stopped!")
+                st.rerun()
         
         if st.button("🎲 Generate Batch"):
             generate_data_batch()
@@ -589,8 +848,7 @@ def show_dashboard():
         
         if not filtered_data.empty:
             # Time range filter
-            min_time = filtered_data['timestamp'].min()
-            max_time = filtered_data['timestamp'].max()
+            min_time, max_time = st.session_state.time_bounds
             
             time_range = st.slider(
                 "⏱️ Time Range",
@@ -617,12 +875,8 @@ def show_dashboard():
             )
             
             # Apply filters
-            filtered_data = filtered_data[
-                (filtered_data['timestamp'] >= time_range[0]) &
-                (filtered_data['timestamp'] <= time_range[1]) &
-                (filtered_data['category'].isin(selected_categories)) &
-                (filtered_data['store_id'].isin(selected_stores))
-            ]
+            filters = (tuple(selected_categories), tuple(selected_stores), time_range)
+            filtered_data = _apply_filters(filtered_data, filters)
     
     if filtered_data.empty:
         st.warning("⚠️ No data matches the selected filters. Please adjust your criteria.")
@@ -641,31 +895,13 @@ def show_dashboard():
     """, unsafe_allow_html=True)
     
     # KPI Section
-    analytics_results = st.session_state.analytics_engine.calculate_metrics(filtered_data)
+    fingerprint = _data_fingerprint(filtered_data) + filters
+    analytics_results = st.session_state.analytics_engine.format_for_display(
+        _cached_metrics(fingerprint, filtered_data)
+    )
     
     st.markdown("## 📈 Key Performance Indicators")
-    
-    kpi_col1, kpi_col2, kpi_col3, kpi_col4, kpi_col5 = st.columns(5)
-    
-    with kpi_col1:
-        total_revenue = filtered_data['total_amount'].sum()
-        st.metric("💰 Total Revenue", f"${total_revenue:,.2f}")
-    
-    with kpi_col2:
-        total_transactions = len(filtered_data)
-        st.metric("🛒 Transactions", f"{total_transactions:,}")
-    
-    with kpi_col3:
-        avg_transaction = filtered_data['total_amount'].mean()
-        st.metric("📊 Avg. Transaction", f"${avg_transaction:.2f}")
-    
-    with kpi_col4:
-        unique_customers = filtered_data['customer_id'].nunique()
-        st.metric("👥 Unique Customers", f"{unique_customers:,}")
-    
-    with kpi_col5:
-        unique_products = filtered_data['product_name'].nunique()
-        st.metric("📦 Products Sold", f"{unique_products}")
+    kpi_placeholder = st.empty()
     
     st.markdown("---")
     
@@ -674,48 +910,32 @@ def show_dashboard():
     
     with chart_col1:
         st.markdown("### 📈 Sales Trend Over Time")
-        
-        # Group by minute for trend analysis
-        trend_data = filtered_data.copy()
-        trend_data['minute'] = trend_data['timestamp'].dt.floor('T')
-        minute_sales = trend_data.groupby('minute')['total_amount'].sum().reset_index()
-        
-        if len(minute_sales) > 0:
-            fig_trend = px.line(
-                minute_sales, 
-                x='minute', 
-                y='total_amount',
-                title="Revenue Trend (Per Minute)",
-                labels={'total_amount': 'Revenue ($)', 'minute': 'Time'}
-            )
-            fig_trend.update_traces(line_color='#667eea', line_width=3)
-            fig_trend.update_layout(
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
-            )
-            st.plotly_chart(fig_trend, use_container_width=True)
+        trend_placeholder = st.empty()
     
     with chart_col2:
         st.markdown("### 🏪 Sales by Category")
         category_sales = analytics_results['category_performance']
         if not category_sales.empty:
-            fig_category = px.bar(
-                category_sales,
-                x='category',
-                y='revenue',
-                title="Revenue by Product Category",
-                labels={'revenue': 'Revenue ($)', 'category': 'Category'},
-                color='revenue',
-                color_continuous_scale='viridis'
-            )
+            fig_category = go.Figure(go.Bar(
+                x=category_sales['category'],
+                y=category_sales['revenue'],
+                marker=dict(color=category_sales['revenue'], colorscale='Viridis',
+                            colorbar=dict(title='Revenue ($)'))
+            ))
             fig_category.update_layout(
+                title="Revenue by Product Category",
+                xaxis_title="Category",
+                yaxis_title="Revenue ($)",
                 height=400,
                 plot_bgcolor='rgba(0,0,0,0)',
                 paper_bgcolor='rgba(0,0,0,0)'
             )
             st.plotly_chart(fig_category, use_container_width=True)
     
+    # KPIs and the trend chart are rewritten in place on each streaming tick
+    live_overview = st.fragment(_live_overview, run_every="2s" if st.session_state.is_streaming else None)
+    live_overview(filtered_data, analytics_results, filters, kpi_placeholder, trend_placeholder)
+    
     # Additional Analytics
     st.markdown("---")
     st.markdown("## 🔍 Detailed Analytics")
@@ -727,16 +947,18 @@ def show_dashboard():
         store_sales = analytics_results['store_performance']
         if not store_sales.empty:
             top_stores = store_sales.head(10)
-            fig_store = px.bar(
-                top_stores,
-                x='store_id',
-                y='revenue',
+            fig_store = go.Figure(go.Bar(
+                x=top_stores['store_id'],
+                y=top_stores['revenue'],
+                marker=dict(color=top_stores['revenue'], colorscale='Plasma',
+                            colorbar=dict(title='Revenue ($)'))
+            ))
+            fig_store.update_layout(
                 title="Top 10 Stores by Revenue",
-                labels={'revenue': 'Revenue ($)', 'store_id': 'Store ID'},
-                color='revenue',
-                color_continuous_scale='plasma'
+                xaxis_title="Store ID",
+                yaxis_title="Revenue ($)",
+                height=400
             )
-            fig_store.update_layout(height=400)
             st.plotly_chart(fig_store, use_container_width=True)
     
     with analytics_col2:
@@ -744,17 +966,19 @@ def show_dashboard():
         product_performance = analytics_results['product_performance'].head(10)
         
         if not product_performance.empty:
-            fig_products = px.bar(
-                product_performance,
-                y='product_name',
-                x='quantity_sold',
+            fig_products = go.Figure(go.Bar(
+                x=product_performance['quantity_sold'],
+                y=product_performance['product_name'],
                 orientation='h',
+                marker=dict(color=product_performance['revenue'], colorscale='Cividis',
+                            colorbar=dict(title='Revenue ($)'))
+            ))
+            fig_products.update_layout(
                 title="Top 10 Products by Quantity Sold",
-                labels={'quantity_sold': 'Quantity Sold', 'product_name': 'Product'},
-                color='revenue',
-                color_continuous_scale='cividis'
+                xaxis_title="Quantity Sold",
+                yaxis_title="Product",
+                height=400
             )
-            fig_products.update_layout(height=400)
             st.plotly_chart(fig_products, use_container_width=True)
     
     # Anomaly Detection Section
@@ -762,57 +986,18 @@ def show_dashboard():
     st.markdown("## 🚨 Anomaly Detection")
     
     if len(filtered_data) > 10:
-        anomalies = st.session_state.anomaly_detector.detect_anomalies(filtered_data)
-        
-        if not anomalies.empty:
-            st.warning(f"⚠️ {len(anomalies)} anomalies detected in recent transactions!")
-            
-            # Anomaly visualization
-            fig_anomalies = go.Figure()
-            
-            # Normal transactions
-            normal_data = filtered_data[~filtered_data.index.isin(anomalies.index)]
-            fig_anomalies.add_trace(go.Scatter(
-                x=normal_data['timestamp'],
-                y=normal_data['total_amount'],
-                mode='markers',
-                name='Normal Transactions',
-                marker=dict(color='#3498db', size=6, opacity=0.7)
-            ))
-            
-            # Anomalous transactions
-            fig_anomalies.add_trace(go.Scatter(
-                x=anomalies['timestamp'],
-                y=anomalies['total_amount'],
-                mode='markers',
-                name='Anomalies',
-                marker=dict(color='#e74c3c', size=12, symbol='x', line=dict(color='white', width=1))
-            ))
-            
-            fig_anomalies.update_layout(
-                title="Transaction Anomalies Detection",
-                xaxis_title="Time",
-                yaxis_title="Transaction Amount ($)",
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
-            )
-            st.plotly_chart(fig_anomalies, use_container_width=True)
-            
-            # Anomaly details
-            with st.expander("📋 Anomaly Details"):
-                st.dataframe(
-                    anomalies[['timestamp', 'product_name', 'total_amount', 'anomaly_score']].round(3),
-                    use_container_width=True
-                )
-        else:
-            st.success("✅ No anomalies detected in current data.")
+        _, stale = _latest_anomalies(fingerprint, filtered_data)
+        # While a fresher result is computed, poll for it without rerunning the page
+        anomaly_section = st.fragment(_anomaly_section, run_every="1s" if stale else None)
+        anomaly_section(fingerprint, filtered_data)
     else:
         st.info("🔄 Generate more data to enable anomaly detection.")
 
 def show_customer_analytics():
     """Display customer analytics and segmentation"""
-    if st.session_state.sales_data.empty:
+    import plotly.express as px  # only these pages use Plotly Express
+    
+    if _sales_data().empty:
         st.info("📊 No data available for customer analysis. Generate some data first!")
         if st.button("🎲 Generate Sample Data"):
             for _ in range(5):
@@ -820,6 +1005,8 @@ def show_customer_analytics():
             st.rerun()
         return
     
+    sales_data = _sales_data()
+    
     st.markdown("""
     <div class="main-header">
         <h1>👥 Customer Intelligence & Segmentation</h1>
@@ -829,8 +1016,8 @@ def show_customer_analytics():
     
     # Customer Segmentation
     with st.spinner("🔄 Analyzing customer segments..."):
-        rfm_data, segment_stats = st.session_state.customer_segmentation.segment_customers(
-            st.session_state.sales_data, n_clusters=5
+        rfm_data, segment_stats = _cached_segments(
+            _data_fingerprint(sales_data), sales_data, n_clusters=5
         )
     
     if not rfm_data.empty:
@@ -838,17 +1025,16 @@ def show_customer_analytics():
         
         # Segment overview
         segment_col1, segment_col2, segment_col3 = st.columns(3)
+        segment_frame = pd.DataFrame.from_dict(segment_stats, orient='index')
         
         with segment_col1:
             st.metric("📊 Total Segments", len(segment_stats))
         
         with segment_col2:
-            largest_segment = max(segment_stats.items(), key=lambda x: x[1]['customer_count'])
-            st.metric("👑 Largest Segment", largest_segment[0])
+            st.metric("👑 Largest Segment", segment_frame['customer_count'].idxmax())
         
         with segment_col3:
-            most_valuable = max(segment_stats.items(), key=lambda x: x[1]['total_revenue'])
-            st.metric("💎 Most Valuable", most_valuable[0])
+            st.metric("💎 Most Valuable", segment_frame['total_revenue'].idxmax())
         
         # Segment details
         for segment_name, stats in segment_stats.items():
@@ -895,7 +1081,7 @@ def show_customer_analytics():
     # Customer Lifetime Value
     st.markdown("## 💎 Customer Lifetime Value")
     
-    clv_data = st.session_state.customer_segmentation.get_customer_lifetime_value(st.session_state.sales_data)
+    clv_data = _cached_clv(_data_fingerprint(sales_data), sales_data)
     
     if not clv_data.empty:
         clv_col1, clv_col2 = st.columns(2)
@@ -929,10 +1115,14 @@ def show_customer_analytics():
 
 def show_predictive_analytics():
     """Display predictive analytics and forecasting"""
-    if st.session_state.sales_data.empty:
+    import plotly.express as px  # only these pages use Plotly Express
+    
+    if _sales_data().empty:
         st.info("📊 No data available for predictions. Generate some data first!")
         return
     
+    sales_data = _sales_data()
+    
     st.markdown("""
     <div class="main-header">
         <h1>🔮 Predictive Analytics & Forecasting</h1>
@@ -947,7 +1137,7 @@ def show_predictive_analytics():
     
     with st.spinner("🤖 Generating sales forecast..."):
         forecast_df, forecast_metrics = st.session_state.predictive_analytics.forecast_sales(
-            st.session_state.sales_data, forecast_days=forecast_days
+            sales_data, forecast_days=forecast_days
         )
     
     if not forecast_df.empty:
@@ -970,9 +1160,9 @@ def show_predictive_analytics():
         fig_forecast = go.Figure()
         
         # Historical data
-        historical = st.session_state.sales_data.copy()
-        historical['timestamp'] = pd.to_datetime(historical['timestamp'])
-        historical_hourly = historical.groupby(historical['timestamp'].dt.floor('H'))['total_amount'].sum().reset_index()
+        historical_hourly = (sales_data.groupby(sales_data['timestamp'].dt.floor('h'))['total_amount']
+                             .sum().reset_index())
+        historical_hourly = _downsample(historical_hourly, 'timestamp', 'total_amount', n_out=2000)
         
         fig_forecast.add_trace(go.Scatter(
             x=historical_hourly['timestamp'],
@@ -1018,6 +1208,7 @@ def show_predictive_analytics():
             yaxis_title="Revenue ($)",
             height=500
         )
+        fig_forecast.update_traces(yhoverformat=',.2f')  # forecasts arrive unrounded
         
         st.plotly_chart(fig_forecast, use_container_width=True)
     
@@ -1025,7 +1216,7 @@ def show_predictive_analytics():
     st.markdown("## 📦 Product Demand Forecasting")
     
     with st.spinner("🔄 Analyzing product demand..."):
-        demand_df, demand_metrics = st.session_state.predictive_analytics.demand_forecasting(st.session_state.sales_data)
+        demand_df, demand_metrics = st.session_state.predictive_analytics.demand_forecasting(sales_data)
     
     if not demand_df.empty:
         demand_col1, demand_col2 = st.columns(2)
@@ -1040,7 +1231,8 @@ def show_predictive_analytics():
                 title="Top 10 Products - 7-Day Demand Forecast",
                 labels={'predicted_7d_total': 'Predicted Demand', 'product_name': 'Product'},
                 color='trend_slope',
-                color_continuous_scale='RdYlGn'
+                color_continuous_scale='RdYlGn',
+                hover_data={'predicted_7d_total': ':.2f', 'trend_slope': ':.3f'}
             )
             st.plotly_chart(fig_demand, use_container_width=True)
         
@@ -1058,7 +1250,7 @@ def show_predictive_analytics():
     # Seasonal Analysis
     st.markdown("## 📅 Seasonal Analysis")
     
-    seasonal_data = st.session_state.predictive_analytics.seasonal_analysis(st.session_state.sales_data)
+    seasonal_data = _cached_seasonal(_data_fingerprint(sales_data), sales_data)
     
     if seasonal_data and 'hourly_patterns' in seasonal_data:
         seasonal_col1, seasonal_col2 = st.columns(2)
@@ -1112,10 +1304,12 @@ def show_reports():
     </div>
     """, unsafe_allow_html=True)
     
-    if st.session_state.sales_data.empty:
+    if _sales_data().empty:
         st.info("📊 No data available for reports. Generate some data first!")
         return
     
+    sales_data = _sales_data()
+    
     # Report generation options
     st.markdown("## 📊 Report Options")
     
@@ -1124,34 +1318,23 @@ def show_reports():
     with report_col1:
         if st.button("📈 Generate Executive Summary"):
             with st.spinner("📝 Generating executive report..."):
-                analytics_results = st.session_state.analytics_engine.calculate_metrics(st.session_state.sales_data)
-                report = st.session_state.report_generator.generate_comprehensive_report(
-                    st.session_state.sales_data, analytics_results
+                st.session_state.generated_report = _cached_report(
+                    _data_fingerprint(sales_data), 'executive', sales_data
                 )
-                st.session_state.generated_report = report
     
     with report_col2:
         if st.button("👥 Customer Analysis Report"):
             with st.spinner("👥 Generating customer report..."):
-                analytics_results = st.session_state.analytics_engine.calculate_metrics(st.session_state.sales_data)
-                rfm_data, segment_stats = st.session_state.customer_segmentation.segment_customers(st.session_state.sales_data)
-                customer_segments = {'segment_stats': segment_stats}
-                report = st.session_state.report_generator.generate_comprehensive_report(
-                    st.session_state.sales_data, analytics_results, customer_segments
+                st.session_state.generated_report = _cached_report(
+                    _data_fingerprint(sales_data), 'customer', sales_data
                 )
-                st.session_state.generated_report = report
     
     with report_col3:
         if st.button("🔮 Predictive Insights Report"):
             with st.spinner("🔮 Generating predictive report..."):
-                analytics_results = st.session_state.analytics_engine.calculate_metrics(st.session_state.sales_data)
-                forecast_df, forecast_metrics = st.session_state.predictive_analytics.forecast_sales(st.session_state.sales_data)
-                demand_df, demand_metrics = st.session_state.predictive_analytics.demand_forecasting(st.session_state.sales_data)
-                predictions = {'sales_forecast': forecast_metrics, 'demand_forecast': demand_metrics}
-                report = st.session_state.report_generator.generate_comprehensive_report(
-                    st.session_state.sales_data, analytics_results, predictions=predictions
+                st.session_state.generated_report = _cached_report(
+                    _data_fingerprint(sales_data), 'predictive', sales_data
                 )
-                st.session_state.generated_report = report
     
     # Display generated report
     if st.session_state.generated_report:
@@ -1165,7 +1348,7 @@ def show_reports():
         
         with export_col1:
             # Export data to CSV
-            csv_content, filename = st.session_state.report_generator.export_to_csv(st.session_state.sales_data)
+            csv_content, filename = get_engines().reports.export_to_csv(sales_data)
             st.download_button(
                 label="📊 Download Data (CSV)",
                 data=csv_content,
@@ -1230,7 +1413,7 @@ def main():
         st.markdown("---")
         st.markdown("### 📊 System Status")
         st.write(f"**🔄 Streaming:** {'🟢 Active' if st.session_state.is_streaming else '🔴 Inactive'}")
-        st.write(f"**📈 Records:** {len(st.session_state.sales_data):,}")
+        st.write(f"**📈 Records:** {len(_sales_data()):,}")
         st.write(f"**⏰ Last Update:** {st.session_state.last_update.strftime('%H:%M:%S')}")
         st.write(f"**📱 Current Page:** {st.session_state.current_page}")
 
@@ -1,44 +1,101 @@
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
+from numba import njit, types
 import warnings
-warnings.filterwarnings('ignore')
+
+# Kernel argument types; read-only 'A' arrays also accept writable and strided inputs
+_F8 = types.Array(types.float64, 1, 'A', readonly=True)
+
+# Customer count above which clustering switches to mini-batches
+_MINIBATCH_MIN_CUSTOMERS = 10000
+
+# Fixed vocabularies for the categorical label columns
+_SEGMENT_NAMES = ['Champions', 'Loyal Customers', 'Potential Loyalists', 'At Risk',
+                  'New Customers', 'Hibernating', 'Promising', 'Lost Customers']
+_CHURN_LABELS = ['Active', 'Low Risk', 'Medium Risk', 'High Risk']
+
+def _quintile_scores(values):
+    """Quintile of each value from 1 (lowest fifth) to 5, with qcut's right-closed bins"""
+    edges = np.quantile(values, [0.2, 0.4, 0.6, 0.8])
+    return (np.searchsorted(edges, values, side='left') + 1).astype(np.int8)
+
+@njit(types.int8[:](_F8, _F8), cache=True)  # no fastmath, it would fold away the NaN check
+def _churn_codes(days_since, avg_gap):
+    """Churn level per customer, from 0 (active) to 3 (high risk)"""
+    n = days_since.shape[0]
+    out = np.zeros(n, dtype=np.int8)
+    for i in range(n):
+        gap = avg_gap[i]
+        if np.isnan(gap) or gap == 0:
+            gap = 30.0  # Default assumption
+        
+        if days_since[i] > gap * 3:
+            out[i] = 3
+        elif days_since[i] > gap * 2:
+            out[i] = 2
+        elif days_since[i] > gap:
+            out[i] = 1
+    return out
 
 class CustomerSegmentation:
     """Advanced customer segmentation and analysis"""
     
     def __init__(self):
         self.kmeans_model = None
-        self.scaler = StandardScaler()
-        self.pca = PCA(n_components=2)
+        self.scaler = None  # StandardScaler, created on the first segmentation
+        self.pca = None
         self.is_fitted = False
+        self._codes_cache = None  # (data, customer codes, customer ids) of the last frame seen
+        self._agg_cache = None  # (data, per-customer aggregates) of the last frame seen
+    
+    def _customer_codes(self, data):
+        """Integer code per transaction for its customer, numbered in sorted customer_id order"""
+        if self._codes_cache is not None and self._codes_cache[0] is data:
+            return self._codes_cache[1], self._codes_cache[2]
+        
+        codes, customer_ids = pd.factorize(data['customer_id'], sort=True)
+        self._codes_cache = (data, codes, customer_ids)
+        return codes, customer_ids
+    
+    def _customer_agg(self, data):
+        """Per-customer recency, frequency, spend and purchase dates from a single groupby"""
+        if self._agg_cache is not None and self._agg_cache[0] is data:
+            return self._agg_cache[1]
+        
+        # Group on the integer codes; the sorted numbering keeps the customer_id order, and the
+        # key sort stays on since row order feeds KMeans and the segment take
+        codes, customer_ids = self._customer_codes(data)
+        agg = data.groupby(codes).agg(
+            frequency=('transaction_id', 'count'),
+            monetary=('total_amount', 'sum'),
+            avg_order_value=('total_amount', 'mean'),
+            first_purchase=('timestamp', 'min'),
+            last_purchase=('timestamp', 'max')
+        )
+        agg.index = pd.Index(customer_ids, name='customer_id')
+        agg.insert(0, 'recency', (data['timestamp'].max() - agg['last_purchase']).dt.days)
+        
+        # Holding the frame keeps its id from being reused by another one
+        self._agg_cache = (data, agg)
+        return agg
         
     def calculate_rfm_metrics(self, data):
         """Calculate RFM (Recency, Frequency, Monetary) metrics for customers"""
         if data.empty:
             return pd.DataFrame()
         
-        # Convert timestamp to datetime
-        data = data.copy()
-        data['timestamp'] = pd.to_datetime(data['timestamp'])
-        current_date = data['timestamp'].max()
-        
         # Calculate RFM metrics
-        rfm = data.groupby('customer_id').agg({
-            'timestamp': lambda x: (current_date - x.max()).days,  # Recency
-            'transaction_id': 'count',  # Frequency
-            'total_amount': 'sum'  # Monetary
-        }).round(2)
-        
-        rfm.columns = ['recency', 'frequency', 'monetary']
-        rfm = rfm.reset_index()
-        
-        # Add RFM scores (1-5 scale)
-        rfm['recency_score'] = pd.qcut(rfm['recency'], 5, labels=[5,4,3,2,1], duplicates='drop')
-        rfm['frequency_score'] = pd.qcut(rfm['frequency'].rank(method='first'), 5, labels=[1,2,3,4,5], duplicates='drop')
-        rfm['monetary_score'] = pd.qcut(rfm['monetary'], 5, labels=[1,2,3,4,5], duplicates='drop')
+        rfm = self._customer_agg(data)[['recency', 'frequency', 'monetary']].reset_index()
+        rfm['monetary'] = rfm['monetary'].round(2)  # recency and frequency are already integers
+        rfm = rfm.astype({'recency': np.int32, 'frequency': np.int32, 'monetary': np.float32})
+        
+        # Add RFM scores (1-5 scale); tied edges simply leave a score unused
+        frequency_order = np.argsort(rfm['frequency'].values, kind='stable')
+        frequency_rank = np.empty(len(rfm))
+        frequency_rank[frequency_order] = np.arange(1, len(rfm) + 1)  # rank(method='first')
+        rfm['recency_score'] = 6 - _quintile_scores(rfm['recency'].values)
+        rfm['frequency_score'] = _quintile_scores(frequency_rank)
+        rfm['monetary_score'] = _quintile_scores(rfm['monetary'].values)
         
         # Calculate RFM combined score
         rfm['rfm_score'] = rfm['recency_score'].astype(str) + rfm['frequency_score'].astype(str) + rfm['monetary_score'].astype(str)
@@ -57,20 +114,32 @@ class CustomerSegmentation:
             return pd.DataFrame(), {}
         
         # Prepare features for clustering
-        features = rfm[['recency', 'frequency', 'monetary']].fillna(0)
+        features = np.ascontiguousarray(
+            rfm[['recency', 'frequency', 'monetary']].to_numpy(dtype=np.float32, na_value=0.0)
+        )
         
-        # Scale features
+        # Scale features; sklearn is imported only once segmentation is actually requested
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+        from sklearn.preprocessing import StandardScaler
+        self.scaler = StandardScaler()
         features_scaled = self.scaler.fit_transform(features)
         
-        # Apply K-means clustering
-        self.kmeans_model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        cluster_labels = self.kmeans_model.fit_predict(features_scaled)
+        # Apply K-means clustering; elkan prunes distance computations on these three dimensions,
+        # and large customer bases fit on mini-batches instead of full Lloyd passes
+        if len(features_scaled) > _MINIBATCH_MIN_CUSTOMERS:
+            self.kmeans_model = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3,
+                                                batch_size=1024, max_iter=100)
+        else:
+            self.kmeans_model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10, algorithm='elkan')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            cluster_labels = self.kmeans_model.fit_predict(features_scaled)
         
         # Add cluster labels
         rfm['cluster'] = cluster_labels
         
         # Define segment names based on RFM characteristics
-        cluster_summary = rfm.groupby('cluster').agg({
+        cluster_summary = rfm.groupby('cluster', sort=False).agg({
             'recency': 'mean',
             'frequency': 'mean', 
             'monetary': 'mean',
@@ -79,7 +148,7 @@ class CustomerSegmentation:
         
         # Assign meaningful names to segments
         segment_names = self._assign_segment_names(cluster_summary)
-        rfm['segment_name'] = rfm['cluster'].map(segment_names)
+        rfm['segment_name'] = pd.Categorical(rfm['cluster'].map(segment_names), categories=_SEGMENT_NAMES)
         
         # Calculate segment statistics
         segment_stats = self._calculate_segment_stats(rfm, data)
@@ -126,36 +195,47 @@ class CustomerSegmentation:
         
         segment_stats = {}
         
+        # Tag every transaction with its customer's segment, then aggregate all segments together;
+        # rfm has one row per customer code, in code order
+        codes, _ = self._customer_codes(original_data)
+        segment_labels = pd.Series(rfm['segment_name'].values.take(codes), index=original_data.index)
+        segment_rows = original_data.groupby(segment_labels, observed=True, sort=False).indices
+        transaction_stats = original_data['total_amount'].groupby(segment_labels, observed=True, sort=False).agg(['sum', 'mean', 'count'])
+        category_revenue = original_data.groupby([segment_labels, 'category'], observed=True, sort=False)['total_amount'].sum()
+        customer_stats = rfm.groupby('segment_name', observed=True, sort=False).agg(
+            customer_count=('customer_id', 'count'),
+            avg_recency=('recency', 'mean'),
+            avg_frequency=('frequency', 'mean'),
+            avg_monetary=('monetary', 'mean')
+        )
+        
+        # Hour of day for every transaction, taken once from the datetime64 values
+        hours = original_data['timestamp'].values.astype('datetime64[h]').astype(np.int64) % 24
+        
         for segment in rfm['segment_name'].unique():
-            if pd.isna(segment):
+            if pd.isna(segment) or segment not in segment_rows:
                 continue
-                
-            segment_customers = rfm[rfm['segment_name'] == segment]['customer_id'].tolist()
-            segment_data = original_data[original_data['customer_id'].isin(segment_customers)]
             
-            if not segment_data.empty:
-                # Calculate category preferences
-                category_prefs = segment_data.groupby('category')['total_amount'].sum().sort_values(ascending=False)
-                
-                # Calculate preferred shopping times
-                segment_data_copy = segment_data.copy()
-                segment_data_copy['hour'] = pd.to_datetime(segment_data_copy['timestamp']).dt.hour
-                popular_hours = segment_data_copy['hour'].value_counts().head(3).index.tolist()
-                
-                # Calculate average metrics
-                stats = {
-                    'customer_count': len(segment_customers),
-                    'avg_recency': rfm[rfm['segment_name'] == segment]['recency'].mean(),
-                    'avg_frequency': rfm[rfm['segment_name'] == segment]['frequency'].mean(),
-                    'avg_monetary': rfm[rfm['segment_name'] == segment]['monetary'].mean(),
-                    'total_revenue': segment_data['total_amount'].sum(),
-                    'avg_transaction_value': segment_data['total_amount'].mean(),
-                    'preferred_categories': category_prefs.head(3).to_dict(),
-                    'popular_shopping_hours': popular_hours,
-                    'total_transactions': len(segment_data)
-                }
-                
-                segment_stats[segment] = stats
+            # Calculate category preferences
+            category_prefs = category_revenue.loc[segment].sort_values(ascending=False)
+            
+            # Calculate preferred shopping times
+            popular_hours = pd.Series(hours[segment_rows[segment]]).value_counts().head(3).index.tolist()
+            
+            # Calculate average metrics
+            stats = {
+                'customer_count': int(customer_stats.at[segment, 'customer_count']),
+                'avg_recency': customer_stats.at[segment, 'avg_recency'],
+                'avg_frequency': customer_stats.at[segment, 'avg_frequency'],
+                'avg_monetary': customer_stats.at[segment, 'avg_monetary'],
+                'total_revenue': transaction_stats.at[segment, 'sum'],
+                'avg_transaction_value': transaction_stats.at[segment, 'mean'],
+                'preferred_categories': category_prefs.head(3).to_dict(),
+                'popular_shopping_hours': popular_hours,
+                'total_transactions': int(transaction_stats.at[segment, 'count'])
+            }
+            
+            segment_stats[segment] = stats
         
         return segment_stats
     
@@ -165,60 +245,52 @@ class CustomerSegmentation:
             return pd.DataFrame()
         
         # Calculate basic CLV metrics
-        data_copy = data.copy()
-        data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
-        
-        clv_data = data_copy.groupby('customer_id').agg({
-            'total_amount': ['sum', 'mean', 'count'],
-            'timestamp': ['min', 'max']
-        })
-        
-        clv_data.columns = ['total_spent', 'avg_order_value', 'frequency', 'first_purchase', 'last_purchase']
+        clv_data = self._customer_agg(data)[
+            ['monetary', 'avg_order_value', 'frequency', 'first_purchase', 'last_purchase']
+        ].rename(columns={'monetary': 'total_spent'})
         
         # Calculate customer lifespan in days
         clv_data['lifespan_days'] = (clv_data['last_purchase'] - clv_data['first_purchase']).dt.days
         clv_data['lifespan_days'] = clv_data['lifespan_days'].fillna(1)  # Handle single-purchase customers
         
-        # Calculate purchase frequency (orders per day)
-        clv_data['purchase_frequency'] = clv_data['frequency'] / (clv_data['lifespan_days'] + 1)
+        # Calculate purchase frequency (orders per day), on the raw arrays
+        purchase_frequency = clv_data['frequency'].to_numpy(np.float64) / (clv_data['lifespan_days'].to_numpy(np.float64) + 1)
         
         # Simple CLV calculation: avg_order_value * purchase_frequency * predicted_lifespan
         predicted_lifespan = 365  # Assume 1 year
-        clv_data['predicted_clv'] = clv_data['avg_order_value'] * clv_data['purchase_frequency'] * predicted_lifespan
+        clv_data['purchase_frequency'] = purchase_frequency
+        clv_data['predicted_clv'] = clv_data['avg_order_value'].to_numpy() * purchase_frequency * predicted_lifespan
         
         # Add CLV segments
         clv_data['clv_quartile'] = pd.qcut(clv_data['predicted_clv'], 4, labels=['Low', 'Medium', 'High', 'Premium'], duplicates='drop')
         
-        return clv_data.reset_index().round(2)
+        # Narrow the table once its values are final; it feeds the histogram and pie chart
+        return clv_data.reset_index().round(2).astype({
+            'total_spent': np.float32, 'avg_order_value': np.float32, 'frequency': np.int32,
+            'lifespan_days': np.int32, 'purchase_frequency': np.float32, 'predicted_clv': np.float32
+        })
     
     def analyze_customer_journey(self, data):
         """Analyze customer purchase journey and behavior patterns"""
         if data.empty:
             return {}
         
-        data_copy = data.copy()
-        data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
-        data_copy = data_copy.sort_values(['customer_id', 'timestamp'])
-        
         journey_stats = {}
         
         # New vs Returning customer analysis
-        first_purchases = data_copy.groupby('customer_id')['timestamp'].min()
-        data_copy['is_first_purchase'] = data_copy.apply(
-            lambda x: x['timestamp'] == first_purchases[x['customer_id']], axis=1
-        )
-        
-        new_customers = data_copy[data_copy['is_first_purchase']]['customer_id'].nunique()
-        returning_customers = data_copy[~data_copy['is_first_purchase']]['customer_id'].nunique()
+        codes, _ = self._customer_codes(data)
+        first_purchase = data.groupby(codes, sort=False)['timestamp'].transform('min')
+        is_first_purchase = data['timestamp'].values == first_purchase.values
         
-        # Category progression analysis
-        customer_category_progression = data_copy.groupby('customer_id')['category'].apply(list)
+        new_customers = data['customer_id'][is_first_purchase].nunique()
+        returning_customers = data['customer_id'][~is_first_purchase].nunique()
         
         # Popular first categories
-        first_categories = data_copy[data_copy['is_first_purchase']]['category'].value_counts()
+        first_categories = data['category'][is_first_purchase].value_counts()
+        first_categories = first_categories[first_categories > 0]
         
         # Cross-selling analysis
-        customers_multi_category = data_copy.groupby('customer_id')['category'].nunique()
+        customers_multi_category = data.groupby(codes, sort=False)['category'].nunique()
         cross_sell_rate = (customers_multi_category > 1).mean()
         
         journey_stats = {
@@ -237,44 +309,31 @@ class CustomerSegmentation:
         if data.empty:
             return pd.DataFrame()
         
-        data_copy = data.copy()
-        data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
-        current_date = data_copy['timestamp'].max()
-        
-        # Calculate days since last purchase for each customer
-        customer_last_purchase = data_copy.groupby('customer_id')['timestamp'].max()
-        days_since_last = (current_date - customer_last_purchase).dt.days
-        
-        # Calculate customer purchase patterns
-        customer_stats = data_copy.groupby('customer_id').agg({
-            'total_amount': ['sum', 'mean', 'count'],
-            'timestamp': ['min', 'max']
-        })
-        
-        customer_stats.columns = ['total_spent', 'avg_transaction', 'frequency', 'first_purchase', 'last_purchase']
-        customer_stats['days_since_last'] = days_since_last
+        # Customer purchase patterns; recency is the days since the last purchase
+        customer_stats = self._customer_agg(data)[
+            ['monetary', 'avg_order_value', 'frequency', 'first_purchase', 'last_purchase', 'recency']
+        ].rename(columns={'monetary': 'total_spent', 'avg_order_value': 'avg_transaction',
+                          'recency': 'days_since_last'})
         customer_stats['days_active'] = (customer_stats['last_purchase'] - customer_stats['first_purchase']).dt.days + 1
         
         # Calculate average days between purchases
         customer_stats['avg_days_between_purchases'] = customer_stats['days_active'] / customer_stats['frequency']
         
         # Define churn risk levels
-        def get_churn_risk(row):
-            days_since = row['days_since_last']
-            avg_gap = row['avg_days_between_purchases']
-            
-            if pd.isna(avg_gap) or avg_gap == 0:
-                avg_gap = 30  # Default assumption
-            
-            if days_since > avg_gap * 3:
-                return 'High Risk'
-            elif days_since > avg_gap * 2:
-                return 'Medium Risk'
-            elif days_since > avg_gap:
-                return 'Low Risk'
-            else:
-                return 'Active'
-        
-        customer_stats['churn_risk'] = customer_stats.apply(get_churn_risk, axis=1)
+        churn_codes = _churn_codes(
+            customer_stats['days_since_last'].to_numpy(dtype=np.float64),
+            customer_stats['avg_days_between_purchases'].to_numpy(dtype=np.float64)
+        )
+        customer_stats['churn_risk'] = pd.Categorical.from_codes(churn_codes, _CHURN_LABELS, ordered=True)
         
-        return customer_stats.reset_index().round(2)
\ No newline at end of file
+        return customer_stats.reset_index().round(2).astype({
+            'total_spent': np.float32, 'avg_transaction': np.float32, 'frequency': np.int32,
+            'days_since_last': np.int32, 'days_active': np.int32, 'avg_days_between_purchases': np.float32
+        })
+
+def warmup():
+    """Run each kernel on tiny inputs so the first real request pays no startup cost"""
+    values = np.ones(2)
+    _churn_codes(values, values)
+
+warmup()
@@ -1,15 +1,82 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
-from faker import Faker
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import os
+from numba import njit, prange, types
+
+# Kernel argument types; read-only 'A' arrays also accept writable and strided inputs
+_F8 = types.Array(types.float64, 1, 'A', readonly=True)
+_I8 = types.Array(types.int64, 1, 'A', readonly=True)
+_F8_2D = types.Array(types.float64, 2, 'A', readonly=True)
+
+# History size from which days are generated in worker processes; below it a
+# single vectorized pass beats the cost of starting the pool
+_PARALLEL_MIN_ROWS = 500_000
+
+# Batch size from which rows are sampled by the fused kernel; smaller batches
+# stay on the NumPy path, where per-call overhead is lower
+_FUSED_MIN_ROWS = 1024
+
+# No fastmath: the cent rounding must match np.round exactly
+@njit(types.void(types.float64[:], types.int32[:], _I8, _F8, _I8, _I8, types.float64,
+                 types.float64[:], types.float64[:], types.float64[:]), cache=True)
+def _apply_totals(unit_price, quantity, price_rows, price_mult, quantity_rows, quantity_mult, tax_rate,
+                  subtotal, tax_amount, total_amount):
+    """Inflate the anomalous rows, then fill the rounded subtotal, tax and total in one pass"""
+    for j in range(price_rows.shape[0]):
+        unit_price[price_rows[j]] *= price_mult[j]
+    for j in range(quantity_rows.shape[0]):
+        quantity[quantity_rows[j]] *= quantity_mult[j]
+    for i in range(unit_price.shape[0]):
+        sub = np.rint(unit_price[i] * quantity[i] * 100.0) / 100.0
+        tax = np.rint(sub * tax_rate * 100.0) / 100.0
+        subtotal[i] = sub
+        tax_amount[i] = tax
+        total_amount[i] = np.rint((sub + tax) * 100.0) / 100.0
+
+# No fastmath: prices and totals must round to cents exactly like np.round
+@njit(types.void(_F8_2D, _F8, _I8, _I8, _F8, _F8, _F8, types.float64, types.float64,
+                 types.int8[:], types.int8[:], types.float64[:], types.int32[:],
+                 types.float64[:], types.float64[:], types.float64[:]), cache=True, parallel=True)
+def _fill_rows(uniforms, category_cum, product_offsets, product_counts, min_price, max_price, quantity_cum,
+               anomaly_chance, tax_rate, category, product, unit_price, quantity, subtotal, tax_amount, total_amount):
+    """Sample category, product, price and quantity, apply anomalies and fill the totals, row by row"""
+    for i in prange(uniforms.shape[1]):
+        # Linear scans over the short cumulative tables (searchsorted side='right'); the last entry is 1.0
+        cat = 0
+        while uniforms[0, i] >= category_cum[cat]:
+            cat += 1
+        category[i] = cat
+        product[i] = product_offsets[cat] + np.int64(uniforms[1, i] * product_counts[cat])
+        
+        price = np.rint((min_price[cat] + uniforms[2, i] * (max_price[cat] - min_price[cat])) * 100.0) / 100.0
+        qty = 1
+        while uniforms[3, i] >= quantity_cum[qty - 1]:
+            qty += 1
+        if qty == 5:
+            qty = 5 + np.int64(uniforms[4, i] * 6)  # 5 to 10 items
+        
+        # Anomalies multiply either the price (5-20x) or the quantity (10-50x)
+        if uniforms[5, i] < anomaly_chance:
+            if uniforms[6, i] < 0.5:
+                price *= 5.0 + 15.0 * uniforms[7, i]
+            else:
+                qty *= 10 + np.int64(uniforms[7, i] * 41)
+        unit_price[i] = price
+        quantity[i] = qty
+        
+        sub = np.rint(price * qty * 100.0) / 100.0
+        tax = np.rint(sub * tax_rate * 100.0) / 100.0
+        subtotal[i] = sub
+        tax_amount[i] = tax
+        total_amount[i] = np.rint((sub + tax) * 100.0) / 100.0
 
 class RetailDataGenerator:
     """Generate synthetic retail sales data for analytics dashboard"""
     
     def __init__(self):
-        self.fake = Faker()
-        
         # Product categories and their typical price ranges
         self.categories = {
             'Electronics': {'min_price': 50, 'max_price': 2000, 'weight': 0.15},
@@ -23,6 +90,12 @@ class RetailDataGenerator:
         # Store locations
         self.stores = [f"STORE_{i:03d}" for i in range(1, 21)]  # 20 stores
         
+        # Payment options
+        self.payment_methods = ['Credit Card', 'Debit Card', 'Cash', 'Digital Wallet']
+        
+        # Every possible customer ID, formatted once and indexed per transaction
+        self.customer_ids = np.array([f"CUST_{i}" for i in range(1000, 10000)], dtype=object)
+        
         # Product names by category
         self.products = {
             'Electronics': [
@@ -57,128 +130,257 @@ class RetailDataGenerator:
             ]
         }
         
-        # Initialize random seed for consistent but varied data
-        random.seed(42)
-        np.random.seed(42)
+        # Lookup tables for vectorized sampling, aligned with the category codes
+        self._category_cum = np.cumsum([info['weight'] for info in self.categories.values()])
+        self._category_cum[-1] = 1.0  # random() < 1 must never fall past the last category
+        self._min_price = np.array([info['min_price'] for info in self.categories.values()], dtype=np.float64)
+        self._max_price = np.array([info['max_price'] for info in self.categories.values()], dtype=np.float64)
+        self._product_counts = np.array([len(self.products[cat]) for cat in self.categories])
+        self._product_offsets = np.concatenate(([0], np.cumsum(self._product_counts)[:-1]))
         
-    def _get_weighted_category(self):
-        """Select a category based on weights"""
-        categories = list(self.categories.keys())
-        weights = [self.categories[cat]['weight'] for cat in categories]
-        return np.random.choice(categories, p=weights)
-    
-    def _generate_transaction(self, timestamp=None):
-        """Generate a single transaction"""
-        if timestamp is None:
-            timestamp = datetime.now()
-        
-        # Select category and product
-        category = self._get_weighted_category()
-        product_name = random.choice(self.products[category])
-        
-        # Generate price based on category
-        min_price = self.categories[category]['min_price']
-        max_price = self.categories[category]['max_price']
-        unit_price = round(random.uniform(min_price, max_price), 2)
-        
-        # Generate quantity (most transactions are single items)
-        quantity_weights = [0.6, 0.25, 0.1, 0.04, 0.01]  # Weights for 1, 2, 3, 4, 5+ items
-        quantity = np.random.choice([1, 2, 3, 4, random.randint(5, 10)], p=quantity_weights)
-        
-        # Calculate totals
-        subtotal = round(unit_price * quantity, 2)
-        tax_rate = 0.08  # 8% tax
-        tax_amount = round(subtotal * tax_rate, 2)
-        total_amount = round(subtotal + tax_amount, 2)
+        # Cumulative weights for 1, 2, 3, 4 and 5+ items (most transactions are single items)
+        self._quantity_cum = np.cumsum([0.6, 0.25, 0.1, 0.04, 0.01])
+        self._quantity_cum[-1] = 1.0
         
-        # Occasionally generate anomalous transactions
-        anomaly_chance = 0.02  # 2% chance of anomaly
-        if random.random() < anomaly_chance:
-            # Create anomalies by multiplying price or quantity
-            anomaly_type = random.choice(['high_price', 'high_quantity'])
-            if anomaly_type == 'high_price':
-                multiplier = random.uniform(5, 20)
-                unit_price *= multiplier
-                subtotal = round(unit_price * quantity, 2)
-                tax_amount = round(subtotal * tax_rate, 2)
-                total_amount = round(subtotal + tax_amount, 2)
-            elif anomaly_type == 'high_quantity':
-                quantity *= random.randint(10, 50)
-                subtotal = round(unit_price * quantity, 2)
-                tax_amount = round(subtotal * tax_rate, 2)
-                total_amount = round(subtotal + tax_amount, 2)
+        # Fixed categorical dtypes so every batch shares the same integer codes
+        self.category_dtype = pd.CategoricalDtype(list(self.categories))
+        self.store_dtype = pd.CategoricalDtype(self.stores)
+        self.product_dtype = pd.CategoricalDtype([p for names in self.products.values() for p in names])
+        self.payment_dtype = pd.CategoricalDtype(self.payment_methods)
         
-        return {
-            'transaction_id': f"TXN_{random.randint(100000, 999999)}",
-            'timestamp': timestamp,
-            'store_id': random.choice(self.stores),
-            'product_name': product_name,
-            'category': category,
-            'unit_price': unit_price,
-            'quantity': quantity,
-            'subtotal': subtotal,
-            'tax_amount': tax_amount,
-            'total_amount': total_amount,
-            'payment_method': random.choice(['Credit Card', 'Debit Card', 'Cash', 'Digital Wallet']),
-            'customer_id': f"CUST_{random.randint(1000, 9999)}"
+        # Column layout of a transaction; categorical columns travel as int8 codes.
+        # Money stays float64 so totals keep their cents; quantities fit easily in int32.
+        self.column_dtypes = {
+            'transaction_id': object,
+            'timestamp': 'datetime64[ns]',
+            'store_id': self.store_dtype,
+            'product_name': self.product_dtype,
+            'category': self.category_dtype,
+            'unit_price': np.float64,
+            'quantity': np.int32,
+            'subtotal': np.float64,
+            'tax_amount': np.float64,
+            'total_amount': np.float64,
+            'payment_method': self.payment_dtype,
+            'customer_id': object
         }
+        
+        # Single seeded generator (PCG64) for consistent but varied data
+        self.rng = np.random.default_rng(42)
+        
+    def _generate_columns(self, timestamps):
+        """Column arrays for one transaction per timestamp, categoricals as int8 codes"""
+        n = len(timestamps)
+        rng = self.rng
+        
+        # Preallocate every column at its final dtype and fill it in place
+        columns = {
+            col: np.empty(n, dtype=np.int8 if isinstance(dtype, pd.CategoricalDtype) else dtype)
+            for col, dtype in self.column_dtypes.items()
+        }
+        columns['timestamp'][:] = timestamps
+        
+        anomaly_chance = 0.02  # 2% chance of anomaly
+        tax_rate = 0.08  # 8% tax
+        
+        if n >= _FUSED_MIN_ROWS:
+            # One parallel pass over pre-drawn uniforms instead of a temporary array per step
+            _fill_rows(rng.random((8, n)), self._category_cum, self._product_offsets, self._product_counts,
+                       self._min_price, self._max_price, self._quantity_cum, anomaly_chance, tax_rate,
+                       columns['category'], columns['product_name'], columns['unit_price'], columns['quantity'],
+                       columns['subtotal'], columns['tax_amount'], columns['total_amount'])
+        else:
+            # Select category and product
+            category = np.searchsorted(self._category_cum, rng.random(n), side='right')
+            columns['category'][:] = category
+            columns['product_name'][:] = self._product_offsets[category] + rng.integers(0, self._product_counts[category])
+            
+            # Generate price based on category (uniform draw scaled into each category's range)
+            min_price = self._min_price[category]
+            unit_price = columns['unit_price']
+            rng.random(out=unit_price)
+            unit_price *= self._max_price[category] - min_price
+            unit_price += min_price
+            np.round(unit_price, 2, out=unit_price)
+            
+            # Generate quantity (most transactions are single items)
+            quantity = columns['quantity']
+            quantity[:] = np.searchsorted(self._quantity_cum, rng.random(n), side='right') + 1
+            large = quantity == 5
+            quantity[large] = rng.integers(5, 11, size=large.sum())
+            
+            # Occasionally generate anomalous transactions by multiplying price or quantity
+            anomalous = rng.random(n) < anomaly_chance
+            high_price = anomalous & (rng.random(n) < 0.5)
+            high_quantity = anomalous & ~high_price
+            price_rows = np.flatnonzero(high_price)
+            quantity_rows = np.flatnonzero(high_quantity)
+            price_mult = rng.uniform(5, 20, size=len(price_rows))
+            quantity_mult = rng.integers(10, 51, size=len(quantity_rows))
+            
+            # Apply the anomalies and calculate totals
+            _apply_totals(unit_price, quantity, price_rows, price_mult, quantity_rows, quantity_mult, tax_rate,
+                          columns['subtotal'], columns['tax_amount'], columns['total_amount'])
+        
+        columns['transaction_id'][:] = np.char.add('TXN_', rng.integers(100000, 1000000, size=n).astype('U6'))
+        columns['store_id'][:] = rng.integers(0, len(self.stores), size=n)
+        columns['payment_method'][:] = rng.integers(0, len(self.payment_methods), size=n)
+        columns['customer_id'][:] = self.customer_ids[rng.integers(0, len(self.customer_ids), size=n)]
+        return columns
     
-    def generate_batch(self, batch_size=10, start_time=None):
-        """Generate a batch of transactions"""
+    def generate_batch(self, batch_size=10, start_time=None, as_arrays=False):
+        """Generate a batch of transactions (as column arrays if as_arrays, else a DataFrame)"""
         if start_time is None:
             start_time = datetime.now()
         
-        transactions = []
-        for i in range(batch_size):
-            # Spread transactions over the last few minutes
-            time_offset = random.uniform(-300, 0)  # Last 5 minutes
-            transaction_time = start_time + timedelta(seconds=time_offset)
-            
-            transaction = self._generate_transaction(transaction_time)
-            transactions.append(transaction)
+        # Spread transactions over the last few minutes
+        time_offset = self.rng.uniform(-300, 0, size=batch_size)  # Last 5 minutes
+        timestamps = np.datetime64(start_time, 'us') + (time_offset * 1e6).astype('timedelta64[us]')
+        timestamps = timestamps.astype('datetime64[ns]')
         
-        return pd.DataFrame(transactions)
+        columns = self._generate_columns(timestamps)
+        if as_arrays:
+            return columns
+        return self.to_frame(columns)
+    
+    def _business_hours(self, day_start):
+        """Timestamps at a random time during business hours (8 AM to 10 PM) of each given midnight"""
+        seconds = self.rng.integers(8 * 3600, 22 * 3600, size=len(day_start))
+        return day_start.astype('datetime64[ns]') + seconds.astype('timedelta64[s]')
     
     def generate_historical_data(self, days=7, transactions_per_day=100):
         """Generate historical data for testing"""
-        all_transactions = []
         end_time = datetime.now()
         
-        for day in range(days):
-            day_start = end_time - timedelta(days=day+1)
-            
-            # Generate transactions throughout the day
-            for _ in range(transactions_per_day):
-                # Random time during business hours (8 AM to 10 PM)
-                hour_offset = random.uniform(8, 22)
-                minute_offset = random.uniform(0, 59)
-                
-                transaction_time = day_start.replace(
-                    hour=int(hour_offset),
-                    minute=int(minute_offset),
-                    second=random.randint(0, 59),
-                    microsecond=0
-                )
-                
-                transaction = self._generate_transaction(transaction_time)
-                all_transactions.append(transaction)
-        
-        return pd.DataFrame(all_transactions)
+        # Midnight of each past day, most recent day first
+        midnights = np.datetime64(end_time.date(), 'D') - np.arange(1, days + 1)
+        
+        workers = min(days, os.cpu_count() or 1)
+        if workers > 1 and days * transactions_per_day >= _PARALLEL_MIN_ROWS:
+            # Days are independent: each worker draws from its own child of this generator's seed
+            seeds = self.rng.bit_generator.seed_seq.spawn(days)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_generate_day, seeds, midnights, repeat(transactions_per_day)))
+            columns = {col: np.concatenate([part[col] for part in parts]) for col in self.column_dtypes}
+        else:
+            columns = self._generate_columns(self._business_hours(np.repeat(midnights, transactions_per_day)))
+        
+        return self.to_frame(columns)
+    
+    def to_frame(self, columns):
+        """DataFrame over column arrays, rebuilding categoricals from their codes"""
+        frame = {}
+        for col, values in columns.items():
+            dtype = self.column_dtypes[col]
+            if isinstance(dtype, pd.CategoricalDtype):
+                frame[col] = pd.Categorical.from_codes(values, dtype=dtype)
+            else:
+                frame[col] = values
+        return pd.DataFrame(frame, copy=False)
+    
+    def _column_codes(self, data, col):
+        """Integer codes (-1 for missing) and their labels for a categorical column"""
+        values = data[col]
+        dtype = self.column_dtypes[col]
+        if not isinstance(values, pd.Series):
+            return np.asarray(values), dtype.categories  # column arrays already hold codes
+        if values.dtype == dtype:
+            return values.cat.codes.to_numpy(), dtype.categories
+        return pd.factorize(values, sort=True)
+    
+    def _count_unique(self, data, col):
+        """Number of distinct non-missing values in a categorical column"""
+        codes, labels = self._column_codes(data, col)
+        return int(np.count_nonzero(np.bincount(codes[codes >= 0], minlength=len(labels))))
     
     def get_summary_stats(self, data):
-        """Get summary statistics for generated data"""
-        if data.empty:
+        """Get summary statistics for generated data, given as a DataFrame or as column arrays"""
+        if len(data) == 0 or len(data['total_amount']) == 0:
             return {}
         
+        # Reductions run on the underlying arrays; categorical columns are counted by code
+        total = np.asarray(data['total_amount'], dtype=np.float64)
+        timestamps = np.asarray(data['timestamp'], dtype='datetime64[ns]')
+        
+        codes, categories = self._column_codes(data, 'category')
+        present = codes >= 0
+        revenue = np.bincount(codes[present], weights=total[present], minlength=len(categories))
+        counts = np.bincount(codes[present], minlength=len(categories))
+        
         return {
-            'total_transactions': len(data),
-            'total_revenue': data['total_amount'].sum(),
-            'avg_transaction_value': data['total_amount'].mean(),
-            'unique_products': data['product_name'].nunique(),
-            'unique_stores': data['store_id'].nunique(),
+            'total_transactions': len(total),
+            'total_revenue': total.sum(),
+            'avg_transaction_value': total.mean(),
+            'unique_products': self._count_unique(data, 'product_name'),
+            'unique_stores': self._count_unique(data, 'store_id'),
             'date_range': {
-                'start': data['timestamp'].min(),
-                'end': data['timestamp'].max()
+                'start': pd.Timestamp(timestamps.min()),
+                'end': pd.Timestamp(timestamps.max())
             },
-            'category_breakdown': data.groupby('category')['total_amount'].sum().to_dict()
+            'category_breakdown': {categories[i]: float(revenue[i]) for i in np.flatnonzero(counts)}
         }
+
+def _generate_day(seed, midnight, transactions_per_day):
+    """Column arrays for one day of history, run in a worker process with its own seed"""
+    generator = RetailDataGenerator()
+    generator.rng = np.random.default_rng(seed)
+    return generator._generate_columns(generator._business_hours(np.full(transactions_per_day, midnight)))
+
+
+class TransactionRingBuffer:
+    """Fixed-capacity ring of per-column numpy arrays holding the newest transactions"""
+    
+    def __init__(self, capacity, column_dtypes):
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0  # next write position
+        self.columns = {
+            col: np.empty(capacity, dtype=np.int8 if isinstance(dtype, pd.CategoricalDtype) else dtype)
+            for col, dtype in column_dtypes.items()
+        }
+    
+    def __len__(self):
+        return self.size
+    
+    def append(self, batch):
+        """Write a batch of column arrays at the head; returns every row that no longer fits"""
+        n = len(batch['timestamp'])
+        if n > self.capacity:
+            # Only the batch's newest `capacity` rows fit: every live row and the batch's older rows are evicted
+            dropped = n - self.capacity
+            live = self.ordered()
+            evicted = {col: np.concatenate((live[col], batch[col][:dropped])) for col in self.columns}
+            for col, values in self.columns.items():
+                values[:] = batch[col][dropped:]
+            self.head = 0
+            self.size = self.capacity
+            return evicted
+        
+        positions = (self.head + np.arange(n)) % self.capacity
+        
+        # Slots past the free space still hold the oldest rows
+        overwritten = positions[max(0, self.capacity - self.size):]
+        evicted = {col: values[overwritten] for col, values in self.columns.items()}
+        
+        for col, values in self.columns.items():
+            values[positions] = batch[col]
+        self.head = (self.head + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        return evicted
+    
+    def ordered(self):
+        """Column arrays oldest-first, copied so later writes cannot reach them"""
+        order = (self.head - self.size + np.arange(self.size)) % self.capacity
+        return {col: values[order] for col, values in self.columns.items()}
+
+def warmup():
+    """Run each kernel on tiny inputs so the first real request pays no startup cost"""
+    values = np.ones(2)
+    rows = np.zeros(1, dtype=np.int64)
+    _apply_totals(values, np.ones(2, dtype=np.int32), rows, values[:1], rows, rows, 0.08,
+                  np.empty(2), np.empty(2), np.empty(2))
+    _fill_rows(np.full((8, 1), 0.5), values, rows, rows + 1, values, values, values, 0.02, 0.08,
+               np.empty(1, dtype=np.int8), np.empty(1, dtype=np.int8), np.empty(1), np.empty(1, dtype=np.int32),
+               np.empty(1), np.empty(1), np.empty(1))
+
+warmup()
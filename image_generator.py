@@ -1,49 +1,82 @@
+import matplotlib
+matplotlib.use("Agg")  # headless backend; images are only rendered to buffers
 import matplotlib.pyplot as plt
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
-import seaborn as sns
-import plotly.graph_objects as go
+from PIL import Image, ImageColor, ImageDraw, ImageFont
 import io
 import base64
+import threading
 
 class ImageGenerator:
     """Generate demo images and graphics for the retail dashboard"""
     
     def __init__(self):
+        import seaborn as sns  # only needed for the palette
+        
         # Set style for better looking plots
         plt.style.use('default')
         sns.set_palette("husl")
-        
+        self._cache = {}  # method name -> rendered images
+    
+    def _cached(self, name, render):
+        """Render images once per generator; the drawings are seeded so repeats are identical"""
+        if self._cache.get(name) is None:
+            self._cache[name] = render(np.random.default_rng(0))
+        return self._cache[name]
+    
     def create_product_category_images(self):
         """Create representative images for different product categories"""
+        return self._cached('category', self._render_product_category_images)
+    
+    def create_dashboard_hero_image(self):
+        """Create an attractive hero image for the dashboard (base64 JPEG)"""
+        return self._cached('hero', self._render_dashboard_hero_image)
+    
+    def create_feature_icons(self):
+        """Create icons for different features"""
+        return self._cached('icons', self._render_feature_icons)
+    
+    def create_kpi_background_images(self):
+        """Create background patterns for KPI cards"""
+        return self._cached('kpi', self._render_kpi_background_images)
+    
+    def _render_product_category_images(self, rng):
+        """Draw the category images and encode them as base64 PNGs"""
         category_images = {}
+        charts = [
+            ('Electronics', self._draw_electronics, '#1e1e2e'),
+            ('Clothing', self._draw_clothing, '#f8f9fa'),
+            ('Food & Beverages', self._draw_food, '#2d5a27')
+        ]
+        
+        # One figure is redrawn for every category
+        fig, ax = plt.subplots(figsize=(4, 3))
+        for category, draw, facecolor in charts:
+            ax.cla()
+            ax.set_facecolor(facecolor)
+            draw(ax, rng)
+            ax.axis('off')
+            fig.tight_layout()
+            
+            category_images[category] = _fig_to_b64(fig, format='png', facecolor=facecolor, dpi=100)
+        plt.close(fig)
         
-        # Electronics - Circuit pattern
-        fig, ax = plt.subplots(figsize=(4, 3), facecolor='#1e1e2e')
-        ax.set_facecolor('#1e1e2e')
-        
-        # Create circuit-like pattern
+        return category_images
+    
+    def _draw_electronics(self, ax, rng):
+        """Electronics - Circuit pattern"""
         x = np.linspace(0, 10, 100)
-        y1 = np.sin(x) + np.random.normal(0, 0.1, 100)
-        y2 = np.cos(x * 1.5) + np.random.normal(0, 0.1, 100)
+        y1 = np.sin(x) + rng.normal(0, 0.1, 100)
+        y2 = np.cos(x * 1.5) + rng.normal(0, 0.1, 100)
         
         ax.plot(x, y1, color='#00ff88', linewidth=2, alpha=0.8)
         ax.plot(x, y2, color='#0088ff', linewidth=2, alpha=0.8)
         ax.scatter(x[::10], y1[::10], color='#ff6b35', s=30, alpha=0.9)
         
         ax.set_title('Electronics', color='white', fontsize=16, fontweight='bold')
-        ax.axis('off')
-        plt.tight_layout()
-        
-        # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#1e1e2e', dpi=100)
-        buffer.seek(0)
-        category_images['Electronics'] = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        # Clothing - Fashion pattern
-        fig, ax = plt.subplots(figsize=(4, 3), facecolor='#f8f9fa')
+    
+    def _draw_clothing(self, ax, rng):
+        """Clothing - Fashion pattern"""
         colors = ['#ff6b9d', '#c44569', '#f8b500', '#feca57']
         
         # Create fashion-inspired pattern
@@ -57,39 +90,19 @@ class ImageGenerator:
         ax.set_xlim(-2.5, 2.5)
         ax.set_ylim(-2.5, 2.5)
         ax.set_title('Clothing', fontsize=16, fontweight='bold', color='#2c3e50')
-        ax.axis('off')
-        plt.tight_layout()
-        
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#f8f9fa', dpi=100)
-        buffer.seek(0)
-        category_images['Clothing'] = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        # Food & Beverages - Organic pattern
-        fig, ax = plt.subplots(figsize=(4, 3), facecolor='#2d5a27')
-        
-        # Create organic food pattern
+    
+    def _draw_food(self, ax, rng):
+        """Food & Beverages - Organic pattern"""
         theta = np.linspace(0, 4*np.pi, 200)
-        r = 1 + 0.3 * np.sin(5*theta) + 0.1 * np.random.normal(0, 1, 200)
+        r = 1 + 0.3 * np.sin(5*theta) + 0.1 * rng.normal(0, 1, 200)
         x = r * np.cos(theta)
         y = r * np.sin(theta)
         
-        scatter = ax.scatter(x, y, c=theta, cmap='Greens', alpha=0.8, s=20)
+        ax.scatter(x, y, c=theta, cmap='Greens', alpha=0.8, s=20)
         ax.set_title('Food & Beverages', color='white', fontsize=16, fontweight='bold')
-        ax.axis('off')
-        plt.tight_layout()
-        
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#2d5a27', dpi=100)
-        buffer.seek(0)
-        category_images['Food & Beverages'] = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        return category_images
     
-    def create_dashboard_hero_image(self):
-        """Create an attractive hero image for the dashboard"""
+    def _render_dashboard_hero_image(self, rng):
+        """Draw the hero image and encode it as a base64 JPEG"""
         fig = plt.figure(figsize=(12, 6), facecolor='#667eea')
         
         # Create a gradient-like effect with data visualization elements
@@ -101,7 +114,7 @@ class ImageGenerator:
         
         # Create sample sales data visualization
         days = np.arange(30)
-        sales = 1000 + np.cumsum(np.random.normal(50, 100, 30))
+        sales = 1000 + np.cumsum(rng.normal(50, 100, 30))
         sales = np.maximum(sales, 500)  # Ensure positive values
         
         # Main trend line
@@ -148,143 +161,166 @@ class ImageGenerator:
         
         plt.tight_layout()
         
-        # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#667eea', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        hero_image = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        # JPEG at screen resolution: the hero is a flat backdrop with no transparency
+        hero_image = _fig_to_b64(fig, format='jpeg', facecolor='#667eea', dpi=90, bbox_inches='tight',
+                                 pil_kwargs={'quality': 85, 'optimize': True})
+        plt.close(fig)
         
         return hero_image
     
-    def create_feature_icons(self):
-        """Create icons for different features"""
+    def _render_feature_icons(self, rng):
+        """Draw the feature icons and encode them as base64 PNGs"""
         icons = {}
+        size = (200, 200)
         
         # Analytics icon
-        fig, ax = plt.subplots(figsize=(2, 2), facecolor='#f8f9fa')
+        img, draw = _canvas(size, '#f8f9fa')
         
         # Create bar chart icon
         bars_x = [0.2, 0.4, 0.6, 0.8]
         bars_y = [0.3, 0.7, 0.5, 0.9]
         colors = ['#667eea', '#764ba2', '#667eea', '#764ba2']
         
-        bars = ax.bar(bars_x, bars_y, width=0.15, color=colors)
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
+        for bar_x, bar_y, color in zip(bars_x, bars_y, colors):
+            (left, top), (right, bottom) = _pixels([bar_x - 0.075, bar_x + 0.075], [bar_y, 0], (0, 1), (0, 1), size)
+            draw.rectangle([left, top, right, bottom], fill=color)
         
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#f8f9fa', dpi=100, bbox_inches='tight')
-        buffer.seek(0)
-        icons['analytics'] = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        icons['analytics'] = _png_base64(img)
         
         # Customer icon
-        fig, ax = plt.subplots(figsize=(2, 2), facecolor='#f8f9fa')
-        
-        # Create people/customer representation
-        circle1 = plt.Circle((0.3, 0.7), 0.1, color='#ff6b9d', alpha=0.8)
-        circle2 = plt.Circle((0.5, 0.7), 0.1, color='#feca57', alpha=0.8)
-        circle3 = plt.Circle((0.7, 0.7), 0.1, color='#0abde3', alpha=0.8)
-        
-        ax.add_patch(circle1)
-        ax.add_patch(circle2)
-        ax.add_patch(circle3)
-        
-        # Add bodies
-        rect1 = plt.Rectangle((0.25, 0.4), 0.1, 0.2, color='#ff6b9d', alpha=0.6)
-        rect2 = plt.Rectangle((0.45, 0.4), 0.1, 0.2, color='#feca57', alpha=0.6)
-        rect3 = plt.Rectangle((0.65, 0.4), 0.1, 0.2, color='#0abde3', alpha=0.6)
+        img, draw = _canvas(size, '#f8f9fa')
         
-        ax.add_patch(rect1)
-        ax.add_patch(rect2)
-        ax.add_patch(rect3)
+        # Create people/customer representation with heads and bodies
+        for head_x, color in zip([0.3, 0.5, 0.7], ['#ff6b9d', '#feca57', '#0abde3']):
+            _ellipse(draw, (head_x, 0.7), 0.1, 0.1, (0, 1), (0, 1), size, _rgba(color, 0.8))
+            (left, top), (right, bottom) = _pixels([head_x - 0.05, head_x + 0.05], [0.6, 0.4], (0, 1), (0, 1), size)
+            draw.rectangle([left, top, right, bottom], fill=_rgba(color, 0.6))
         
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#f8f9fa', dpi=100, bbox_inches='tight')
-        buffer.seek(0)
-        icons['customers'] = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        icons['customers'] = _png_base64(img)
         
         # Prediction icon
-        fig, ax = plt.subplots(figsize=(2, 2), facecolor='#f8f9fa')
+        img, draw = _canvas(size, '#f8f9fa')
+        xlim = (0, 2*np.pi)
         
         # Create crystal ball/prediction icon
         x = np.linspace(0, 2*np.pi, 100)
         y1 = 0.5 + 0.3 * np.sin(x)
         y2 = 0.5 + 0.2 * np.cos(2*x)
         
-        ax.plot(x, y1, color='#9b59b6', linewidth=3, alpha=0.8)
-        ax.plot(x, y2, color='#e74c3c', linewidth=2, alpha=0.6)
+        draw.line(_pixels(x, y1, xlim, (0, 1), size), fill=_rgba('#9b59b6', 0.8), width=6, joint='curve')
+        draw.line(_pixels(x, y2, xlim, (0, 1), size), fill=_rgba('#e74c3c', 0.6), width=4, joint='curve')
         
         # Add prediction arrow
-        arrow = plt.Arrow(4, 0.5, 1, 0.2, width=0.3, color='#f39c12', alpha=0.8)
-        ax.add_patch(arrow)
-        
-        ax.set_xlim(0, 2*np.pi)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
+        _arrow(draw, (4, 0.5), (5, 0.7), xlim, (0, 1), size, _rgba('#f39c12', 0.8), width=10, head=24)
         
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#f8f9fa', dpi=100, bbox_inches='tight')
-        buffer.seek(0)
-        icons['predictions'] = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        icons['predictions'] = _png_base64(img)
         
         return icons
     
-    def create_kpi_background_images(self):
-        """Create background patterns for KPI cards"""
+    def _render_kpi_background_images(self, rng):
+        """Draw the KPI card backgrounds and encode them as base64 PNGs"""
         backgrounds = {}
+        size = (300, 200)
         
         # Revenue background
-        fig, ax = plt.subplots(figsize=(3, 2), facecolor='#2ecc71')
+        img, draw = _canvas(size, '#2ecc71')
+        xlim, ylim = (0, 4*np.pi), (-0.1, 0.1)
         
         # Create money/growth pattern
         x = np.linspace(0, 4*np.pi, 200)
         y = np.exp(x/8) * np.sin(x) * 0.1
-        ax.plot(x, y, color='white', alpha=0.3, linewidth=2)
+        draw.line(_pixels(x, y, xlim, ylim, size), fill=_rgba('white', 0.3), width=3, joint='curve')
         
-        # Add dollar signs pattern
+        # Add dollar signs pattern; text is not alpha-blended, so it goes on its own layer
+        font = ImageFont.load_default(size=28)
+        text_layer = Image.new('RGBA', size, (0, 0, 0, 0))
+        text_draw = ImageDraw.Draw(text_layer)
         for i in range(5):
-            ax.text(i*np.pi, 0.05, '$', fontsize=20, color='white', alpha=0.2, ha='center')
+            (text_x, text_y), = _pixels([i*np.pi], [0.05], xlim, ylim, size)
+            text_draw.text((text_x, text_y), '$', fill=_rgba('white', 0.2), font=font, anchor='ms')
         
-        ax.set_xlim(0, 4*np.pi)
-        ax.set_ylim(-0.1, 0.1)
-        ax.axis('off')
-        
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#2ecc71', dpi=100, bbox_inches='tight')
-        buffer.seek(0)
-        backgrounds['revenue'] = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        backgrounds['revenue'] = _png_base64(Image.alpha_composite(img.convert('RGBA'), text_layer).convert('RGB'))
         
         # Transactions background
-        fig, ax = plt.subplots(figsize=(3, 2), facecolor='#3498db')
-        
-        # Create transaction flow pattern
-        for i in range(10):
-            x_pos = i * 0.4
-            y_pos = 0.5 + 0.3 * np.sin(i)
-            circle = plt.Circle((x_pos, y_pos), 0.1, color='white', alpha=0.2)
-            ax.add_patch(circle)
-            if i < 9:
-                ax.arrow(x_pos + 0.1, y_pos, 0.2, 0, head_width=0.05, head_length=0.05, 
-                        fc='white', ec='white', alpha=0.3)
-        
-        ax.set_xlim(0, 4)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', facecolor='#3498db', dpi=100, bbox_inches='tight')
-        buffer.seek(0)
-        backgrounds['transactions'] = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
-        
-        return backgrounds
\ No newline at end of file
+        img, draw = _canvas(size, '#3498db')
+        xlim, ylim = (0, 4), (0, 1)
+        
+        # Create transaction flow pattern: all dot boxes and arrow ends mapped to pixels in one pass
+        xs = np.arange(10) * 0.4
+        ys = 0.5 + 0.3 * np.sin(np.arange(10))
+        corners = np.array(_pixels(np.r_[xs - 0.1, xs + 0.1], np.r_[ys + 0.1, ys - 0.1], xlim, ylim, size))
+        boxes = np.hstack([corners[:10], corners[10:]])
+        ends = np.array(_pixels(np.r_[xs[:-1] + 0.1, xs[:-1] + 0.35], np.r_[ys[:-1], ys[:-1]], xlim, ylim, size))
+        tails, tips = ends[:9], ends[9:]
+        
+        dot_fill, arrow_fill = _rgba('white', 0.2), _rgba('white', 0.3)
+        for box in boxes.tolist():
+            draw.ellipse(box, fill=dot_fill)
+        # Arrows are horizontal, so each head is a fixed 8 px triangle behind the tip
+        for (tail_x, y), (tip_x, _) in zip(tails.tolist(), tips.tolist()):
+            draw.line([(tail_x, y), (tip_x - 8, y)], fill=arrow_fill, width=2)
+            draw.polygon([(tip_x, y), (tip_x - 8, y + 4), (tip_x - 8, y - 4)], fill=arrow_fill)
+        
+        backgrounds['transactions'] = _png_base64(img)
+        
+        return backgrounds
+
+
+def _rgba(color, alpha=1.0):
+    """PIL colour tuple for a named or hex colour with the given opacity"""
+    return ImageColor.getrgb(color)[:3] + (int(round(alpha * 255)),)
+
+def _canvas(size, color):
+    """Blank image and a drawer that alpha-blends RGBA fills onto it"""
+    img = Image.new('RGB', size, color)
+    return img, ImageDraw.Draw(img, 'RGBA')
+
+_BUFFERS = threading.local()  # one reusable encoding buffer per thread
+
+def _pooled_buffer():
+    """This thread's encoding buffer, emptied for the next image"""
+    buffer = getattr(_BUFFERS, 'buffer', None)
+    if buffer is None:
+        buffer = _BUFFERS.buffer = io.BytesIO()
+    buffer.seek(0)
+    buffer.truncate()
+    return buffer
+
+def _fig_to_b64(fig, **savefig_kw):
+    """Save a matplotlib figure and return it as base64 text"""
+    buffer = _pooled_buffer()
+    fig.savefig(buffer, **savefig_kw)
+    return _buffer_base64(buffer)
+
+def _png_base64(img):
+    """Encode a PIL image as a base64 PNG string"""
+    buffer = _pooled_buffer()
+    img.save(buffer, format='PNG')
+    return _buffer_base64(buffer)
+
+def _buffer_base64(buffer):
+    """Base64 text of a BytesIO's contents, encoded from a view rather than a copy"""
+    with buffer.getbuffer() as view:
+        return base64.b64encode(view).decode('ascii')
+
+def _pixels(x, y, xlim, ylim, size):
+    """Map data coordinates onto the canvas, with y pointing up as in a chart"""
+    px = (np.asarray(x, dtype=float) - xlim[0]) / (xlim[1] - xlim[0]) * (size[0] - 1)
+    py = (ylim[1] - np.asarray(y, dtype=float)) / (ylim[1] - ylim[0]) * (size[1] - 1)
+    return list(zip(px.tolist(), py.tolist()))
+
+def _ellipse(draw, center, rx, ry, xlim, ylim, size, fill):
+    """Draw an ellipse given its centre and radii in data coordinates"""
+    (left, top), (right, bottom) = _pixels([center[0] - rx, center[0] + rx], [center[1] + ry, center[1] - ry], xlim, ylim, size)
+    draw.ellipse([left, top, right, bottom], fill=fill)
+
+def _arrow(draw, start, end, xlim, ylim, size, fill, width, head):
+    """Draw a straight arrow in data coordinates with a triangular head of the given pixel length"""
+    (x0, y0), (x1, y1) = _pixels([start[0], end[0]], [start[1], end[1]], xlim, ylim, size)
+    length = np.hypot(x1 - x0, y1 - y0)
+    ux, uy = (x1 - x0) / length, (y1 - y0) / length
+    base_x, base_y = x1 - ux * head, y1 - uy * head
+    draw.line([(x0, y0), (base_x, base_y)], fill=fill, width=width)
+    draw.polygon([(x1, y1),
+                  (base_x - uy * head / 2, base_y + ux * head / 2),
+                  (base_x + uy * head / 2, base_y - ux * head / 2)], fill=fill)
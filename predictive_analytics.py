@@ -1,22 +1,90 @@
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-from sklearn.preprocessing import StandardScaler
-from datetime import datetime, timedelta
+import polars as pl
+from numba import njit, types
+from sklearn.ensemble import HistGradientBoostingRegressor
+from datetime import datetime
 import warnings
-warnings.filterwarnings('ignore')
+
+# Inventory classes, and the recommendation for each (ABC, XYZ) pair
+_ABC_CLASSES = np.array(['A', 'B', 'C'], dtype=object)
+_XYZ_CLASSES = np.array(['X', 'Y', 'Z'], dtype=object)
+_RECOMMENDATIONS = np.array([
+    ["High priority - maintain high stock levels with frequent monitoring"] * 2
+    + ["High revenue but unpredictable - maintain safety stock"],
+    ["Medium priority - moderate stock levels with regular reviews"] * 3,
+    ["Low priority but predictable - minimal stock levels"] * 2
+    + ["Low priority and unpredictable - consider discontinuation"]
+], dtype=object)
+
+_DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], dtype=object)
+
+# Kernel argument types; read-only 'A' arrays also accept writable and strided inputs
+_F8 = types.Array(types.float64, 1, 'A', readonly=True)
+
+@njit(types.void(_F8, types.float64[:], types.float64[:], types.float64[:], types.float64[:], types.float64[:]),
+      cache=True, fastmath=True)
+def _lags_and_means(revenue, lag_1, lag_24, ma_3, ma_12, ma_24):
+    """Revenue 1 and 24 hours back plus trailing 3/12/24-hour means, in one running-sum pass"""
+    n = revenue.shape[0]
+    sum_3 = sum_12 = sum_24 = 0.0
+    for i in range(n):
+        value = revenue[i]
+        sum_3 += value
+        sum_12 += value
+        sum_24 += value
+        if i >= 3:
+            sum_3 -= revenue[i - 3]
+        if i >= 12:
+            sum_12 -= revenue[i - 12]
+        if i >= 24:
+            sum_24 -= revenue[i - 24]
+        ma_3[i] = sum_3 / min(i + 1, 3)
+        ma_12[i] = sum_12 / min(i + 1, 12)
+        ma_24[i] = sum_24 / min(i + 1, 24)
+        
+        # Hours with no history that far back get zero rather than a value from later in the series
+        lag_1[i] = revenue[i - 1] if i >= 1 else 0.0
+        lag_24[i] = revenue[i - 24] if i >= 24 else 0.0
+
+def _bucket_means(keys, values, size, missing=0.0):
+    """Mean of values for each integer key in 0..size-1 (missing for keys that never occur)"""
+    sums = np.bincount(keys, weights=values, minlength=size)
+    counts = np.bincount(keys, minlength=size)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), missing)
+
+def _calendar_fields(timestamps):
+    """Hour, day of week, day of month and month of datetime64 values (1970-01-01 was a Thursday)"""
+    days = timestamps.astype('datetime64[D]')
+    months = timestamps.astype('datetime64[M]')
+    hour = timestamps.astype('datetime64[h]').astype(np.int64) % 24
+    day_of_week = (days.astype(np.int64) + 3) % 7
+    day_of_month = (days - months.astype('datetime64[D]')).astype(np.int64) + 1
+    month = months.astype(np.int64) % 12 + 1
+    return hour, day_of_week, day_of_month, month
 
 class PredictiveAnalytics:
     """Advanced predictive analytics for retail forecasting"""
     
     def __init__(self):
-        self.sales_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.demand_model = LinearRegression()
-        self.scaler = StandardScaler()
+        # Histogram-based boosting: features are binned once, trees split on the bins
+        self.sales_model = HistGradientBoostingRegressor(max_iter=200, max_depth=8, learning_rate=0.05,
+                                                         early_stopping=False, random_state=42)
         self.is_fitted = False
+        self._ts_cache = None  # (data, datetime64 timestamps) of the last frame seen
+    
+    def _timestamps(self, data):
+        """Timestamps of a frame as datetime64[ns] values, converted once per frame"""
+        if self._ts_cache is not None and self._ts_cache[0] is data:
+            return self._ts_cache[1]
         
+        timestamps = data['timestamp']
+        if not pd.api.types.is_datetime64_dtype(timestamps):
+            timestamps = pd.to_datetime(timestamps)
+        timestamps = timestamps.to_numpy(dtype='datetime64[ns]')
+        self._ts_cache = (data, timestamps)
+        return timestamps
+    
     def forecast_sales(self, data, forecast_days=7):
         """Forecast sales for the next N days"""
         if data.empty:
@@ -35,11 +103,15 @@ class PredictiveAnalytics:
             if features_df.empty:
                 return pd.DataFrame(), {'error': 'Could not create features'}
             
-            # Train model
-            X = features_df.drop(['revenue', 'timestamp'], axis=1)
-            y = features_df['revenue']
+            # Train model; hourly transaction and item counts are not known ahead, so they are not features.
+            # Features go in as one C-contiguous float64 matrix, the layout and dtype the model works in.
+            feature_columns = features_df.columns.drop(['revenue', 'timestamp', 'transactions', 'items_sold'])
+            X = np.ascontiguousarray(features_df[feature_columns].to_numpy(dtype=np.float64))
+            y = features_df['revenue'].to_numpy(dtype=np.float64)
             
-            self.sales_model.fit(X, y)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                self.sales_model.fit(X, y)
             
             # Generate future dates and features
             future_data = self._generate_future_features(ts_data, forecast_days)
@@ -48,7 +120,7 @@ class PredictiveAnalytics:
                 return pd.DataFrame(), {'error': 'Could not generate future features'}
             
             # Make predictions
-            future_X = future_data.drop(['timestamp'], axis=1)
+            future_X = np.ascontiguousarray(future_data[feature_columns].to_numpy(dtype=np.float64))
             predictions = self.sales_model.predict(future_X)
             
             # Create forecast dataframe
@@ -59,78 +131,69 @@ class PredictiveAnalytics:
                 'confidence_upper': predictions * 1.2
             })
             
-            # Calculate model metrics
-            train_predictions = self.sales_model.predict(X)
+            # Calculate model metrics from one set of training residuals
+            residuals = y - self.sales_model.predict(X)
+            sse = residuals @ residuals
+            sst = np.square(y - y.mean()).sum()
             metrics = {
-                'mae': mean_absolute_error(y, train_predictions),
-                'rmse': np.sqrt(mean_squared_error(y, train_predictions)),
-                'model_score': self.sales_model.score(X, y),
+                'mae': np.abs(residuals).mean(),
+                'rmse': np.sqrt(sse / len(residuals)),
+                'model_score': 1 - sse / sst if sst > 0 else float(sse == 0),  # R², as sklearn scores it
                 'forecast_total': forecast_df['predicted_revenue'].sum()
             }
             
             self.is_fitted = True
-            return forecast_df.round(2), metrics
+            return forecast_df, metrics
             
         except Exception as e:
             return pd.DataFrame(), {'error': f'Forecasting error: {str(e)}'}
     
     def _prepare_time_series(self, data):
         """Prepare data for time series analysis"""
-        data_copy = data.copy()
-        data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
+        # Hours are contiguous integers, so every bucket (empty ones included) is one bincount slot
+        hours = self._timestamps(data).astype('datetime64[h]').astype(np.int64)
+        start = hours.min() if len(hours) else 0
+        slots = hours - start
+        size = slots.max() + 1 if len(slots) else 0
         
-        # Aggregate by hour
-        hourly_data = data_copy.groupby(data_copy['timestamp'].dt.floor('H')).agg({
-            'total_amount': 'sum',
-            'transaction_id': 'count',
-            'quantity': 'sum'
-        }).rename(columns={
-            'total_amount': 'revenue',
-            'transaction_id': 'transactions',
-            'quantity': 'items_sold'
+        # Every row is one transaction, so its count is the row count
+        return pd.DataFrame({
+            'timestamp': (start + np.arange(size)).astype('datetime64[h]').astype('datetime64[ns]'),
+            'revenue': np.bincount(slots, weights=data['total_amount'].to_numpy(dtype=np.float64), minlength=size),
+            'transactions': np.bincount(slots, minlength=size).astype(np.int64),
+            'items_sold': np.bincount(slots, weights=data['quantity'].to_numpy(dtype=np.float64), minlength=size).astype(np.int64)
         })
-        
-        # Fill missing hours with zero
-        if not hourly_data.empty:
-            full_range = pd.date_range(
-                start=hourly_data.index.min(),
-                end=hourly_data.index.max(),
-                freq='H'
-            )
-            hourly_data = hourly_data.reindex(full_range, fill_value=0)
-        
-        return hourly_data.reset_index().rename(columns={'index': 'timestamp'})
     
     def _create_time_features(self, ts_data):
         """Create time-based features for forecasting"""
         if ts_data.empty:
             return pd.DataFrame()
         
-        df = ts_data.copy()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = ts_data.copy(deep=False)  # new columns only; the series itself is not modified
         
-        # Time features
-        df['hour'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['day_of_month'] = df['timestamp'].dt.day
-        df['month'] = df['timestamp'].dt.month
+        # Time features from the raw datetime64 values
+        hour, day_of_week, day_of_month, month = _calendar_fields(df['timestamp'].to_numpy(dtype='datetime64[ns]'))
+        df['hour'] = hour
+        df['day_of_week'] = day_of_week
+        df['day_of_month'] = day_of_month
+        df['month'] = month
         df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
         
-        # Lag features
-        df['revenue_lag_1'] = df['revenue'].shift(1)
-        df['revenue_lag_24'] = df['revenue'].shift(24)  # 24 hours ago
-        
-        # Rolling averages
-        df['revenue_ma_3'] = df['revenue'].rolling(window=3, min_periods=1).mean()
-        df['revenue_ma_12'] = df['revenue'].rolling(window=12, min_periods=1).mean()
-        df['revenue_ma_24'] = df['revenue'].rolling(window=24, min_periods=1).mean()
+        # Lag features and rolling averages
+        revenue = df['revenue'].to_numpy(dtype=np.float64)
+        lag_1, lag_24, ma_3, ma_12, ma_24 = (np.empty_like(revenue) for _ in range(5))
+        _lags_and_means(revenue, lag_1, lag_24, ma_3, ma_12, ma_24)
+        df['revenue_lag_1'] = lag_1
+        df['revenue_lag_24'] = lag_24  # 24 hours ago
+        df['revenue_ma_3'] = ma_3
+        df['revenue_ma_12'] = ma_12
+        df['revenue_ma_24'] = ma_24
         
-        # Trend features
-        df['hour_rank'] = df.groupby('hour')['revenue'].transform('mean')
-        df['dow_rank'] = df.groupby('day_of_week')['revenue'].transform('mean')
-        
-        # Fill NaN values
-        df = df.fillna(method='bfill').fillna(0)
+        # Trend features: mean revenue of each row's hour of day and day of week
+        hours = df['hour'].to_numpy()
+        weekdays = df['day_of_week'].to_numpy()
+        df['hour_rank'] = _bucket_means(hours, revenue, 24)[hours]
+        df['dow_rank'] = _bucket_means(weekdays, revenue, 7)[weekdays]
         
         return df
     
@@ -139,38 +202,36 @@ class PredictiveAnalytics:
         if historical_data.empty:
             return pd.DataFrame()
         
-        # Get the last timestamp and generate future timestamps
-        last_timestamp = historical_data['timestamp'].max()
-        future_timestamps = pd.date_range(
-            start=last_timestamp + timedelta(hours=1),
-            periods=forecast_days * 24,
-            freq='H'
-        )
-        
-        # Create future dataframe
-        future_df = pd.DataFrame({'timestamp': future_timestamps})
-        
-        # Add time features
-        future_df['hour'] = future_df['timestamp'].dt.hour
-        future_df['day_of_week'] = future_df['timestamp'].dt.dayofweek
-        future_df['day_of_month'] = future_df['timestamp'].dt.day
-        future_df['month'] = future_df['timestamp'].dt.month
-        future_df['is_weekend'] = (future_df['day_of_week'] >= 5).astype(int)
+        # Future hours follow the last observed hour; the feature fills are plain array ops
+        timestamps = historical_data['timestamp'].to_numpy(dtype='datetime64[ns]')
+        future_timestamps = timestamps.max() + np.arange(1, forecast_days * 24 + 1) * np.timedelta64(1, 'h')
+        hour, day_of_week, day_of_month, month = _calendar_fields(future_timestamps)
         
         # Use historical averages for lag features and moving averages
-        recent_revenue = historical_data['revenue'].tail(24).mean()
-        future_df['revenue_lag_1'] = recent_revenue
-        future_df['revenue_lag_24'] = recent_revenue
-        future_df['revenue_ma_3'] = recent_revenue
-        future_df['revenue_ma_12'] = recent_revenue
-        future_df['revenue_ma_24'] = recent_revenue
+        revenue = historical_data['revenue'].to_numpy(dtype=np.float64)
+        recent_revenue = revenue[-24:].mean()
         
         # Use historical patterns for trend features
-        hour_patterns = historical_data.groupby(historical_data['timestamp'].dt.hour)['revenue'].mean()
-        dow_patterns = historical_data.groupby(historical_data['timestamp'].dt.dayofweek)['revenue'].mean()
+        hist_hour, hist_dow, _, _ = _calendar_fields(timestamps)
+        hour_patterns = _bucket_means(hist_hour, revenue, 24, recent_revenue)
+        dow_patterns = _bucket_means(hist_dow, revenue, 7, recent_revenue)
         
-        future_df['hour_rank'] = future_df['hour'].map(hour_patterns).fillna(recent_revenue)
-        future_df['dow_rank'] = future_df['day_of_week'].map(dow_patterns).fillna(recent_revenue)
+        # Create future dataframe in one constructor call
+        future_df = pd.DataFrame({
+            'timestamp': future_timestamps,
+            'hour': hour,
+            'day_of_week': day_of_week,
+            'day_of_month': day_of_month,
+            'month': month,
+            'is_weekend': (day_of_week >= 5).astype(int),
+            'revenue_lag_1': recent_revenue,
+            'revenue_lag_24': recent_revenue,
+            'revenue_ma_3': recent_revenue,
+            'revenue_ma_12': recent_revenue,
+            'revenue_ma_24': recent_revenue,
+            'hour_rank': hour_patterns[hour],
+            'dow_rank': dow_patterns[day_of_week]
+        })
         
         return future_df
     
@@ -180,46 +241,71 @@ class PredictiveAnalytics:
             return pd.DataFrame(), {}
         
         try:
-            # Aggregate demand by product and time
-            data_copy = data.copy()
-            data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
-            data_copy['date'] = data_copy['timestamp'].dt.date
-            
-            # Daily product demand
-            daily_demand = data_copy.groupby(['date', 'product_name', 'category']).agg({
-                'quantity': 'sum',
-                'total_amount': 'sum'
-            }).reset_index()
+            # Aggregate demand by product and time, on integer codes
+            product_codes, products = pd.factorize(data['product_name'], sort=True)
+            category_codes, category_names = pd.factorize(data['category'], sort=True)
+            quantity = data['quantity'].to_numpy()
+            
+            # Daily product demand, grouped in Polars and ordered by product then date
+            daily_demand = (
+                pl.DataFrame({
+                    'product': product_codes,
+                    'date': self._timestamps(data).astype('datetime64[D]'),
+                    'category': category_codes,
+                    'quantity': quantity
+                })
+                .lazy()
+                .group_by(['product', 'date'])
+                .agg([
+                    pl.col('category').first(),
+                    pl.col('quantity').sum()
+                ])
+                .sort(['product', 'date'])
+                .collect()
+            )
             
             # Get top products for forecasting
-            top_products = data_copy.groupby('product_name')['quantity'].sum().nlargest(10).index
+            product_totals = pd.Series(np.bincount(product_codes, weights=quantity, minlength=len(products)), index=products)
+            top_products = product_totals.nlargest(10).index
+            
+            # Each top product's daily quantities in date order, packed into one row per product;
+            # a product's trend runs over the days it sold, numbered 0..n-1
+            top_rank = np.full(len(products), -1)
+            top_rank[products.get_indexer(top_products)] = np.arange(len(top_products))
+            row_code = daily_demand['product'].to_numpy()
+            in_top = top_rank[row_code] >= 0
+            row_code = row_code[in_top]
+            row_product = top_rank[row_code]
+            day_num = np.arange(len(row_code)) - np.searchsorted(row_code, row_code)  # rows are sorted by product
+            n = np.bincount(row_product, minlength=len(top_products))
+            quantities = np.zeros((len(top_products), n.max() if len(n) else 0))
+            quantities[row_product, day_num] = daily_demand['quantity'].to_numpy()[in_top]
+            categories = np.empty(len(top_products), dtype=object)
+            categories[row_product[day_num == 0]] = np.asarray(category_names, dtype=object)[
+                daily_demand['category'].to_numpy()[in_top][day_num == 0]
+            ]
+            
+            # Closed-form least-squares line for all products at once
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean_x = (n - 1) / 2
+                mean_y = quantities.sum(axis=1) / n
+                sum_xy = quantities @ np.arange(quantities.shape[1])
+                slope = (sum_xy - n * mean_x * mean_y) / (n * (n * n - 1) / 12)
+                intercept = mean_y - slope * mean_x
+            
+            # Predict the next 7 days
+            future_days = n[:, None] + np.arange(1, 8)
+            future_demand = np.maximum(intercept[:, None] + slope[:, None] * future_days, 0)
             
             product_forecasts = {}
-            
-            for product in top_products:
-                product_data = daily_demand[daily_demand['product_name'] == product].copy()
-                
-                if len(product_data) >= 3:  # Need minimum data
-                    # Simple trend analysis
-                    product_data['day_num'] = range(len(product_data))
-                    
-                    # Fit linear trend
-                    X = product_data[['day_num']].values
-                    y = product_data['quantity'].values
-                    
-                    self.demand_model.fit(X, y)
-                    
-                    # Predict next 7 days
-                    future_days = np.array([[len(product_data) + i] for i in range(1, 8)])
-                    future_demand = np.maximum(self.demand_model.predict(future_days), 0)
-                    
-                    product_forecasts[product] = {
-                        'current_avg_daily': product_data['quantity'].mean(),
-                        'trend_slope': self.demand_model.coef_[0] if hasattr(self.demand_model, 'coef_') else 0,
-                        'predicted_demand_7d': future_demand.tolist(),
-                        'total_predicted_7d': future_demand.sum(),
-                        'category': product_data['category'].iloc[0]
-                    }
+            for k in np.flatnonzero(n >= 3):  # Need minimum data
+                product_forecasts[top_products[k]] = {
+                    'current_avg_daily': mean_y[k],
+                    'trend_slope': slope[k],
+                    'predicted_demand_7d': future_demand[k].tolist(),
+                    'total_predicted_7d': future_demand[k].sum(),
+                    'category': categories[k]
+                }
             
             # Create summary forecast dataframe
             forecast_summary = []
@@ -227,9 +313,9 @@ class PredictiveAnalytics:
                 forecast_summary.append({
                     'product_name': product,
                     'category': forecast['category'],
-                    'current_avg_daily': round(forecast['current_avg_daily'], 2),
-                    'trend_slope': round(forecast['trend_slope'], 3),
-                    'predicted_7d_total': round(forecast['total_predicted_7d'], 2),
+                    'current_avg_daily': forecast['current_avg_daily'],
+                    'trend_slope': forecast['trend_slope'],
+                    'predicted_7d_total': forecast['total_predicted_7d'],
                     'trend_direction': 'Increasing' if forecast['trend_slope'] > 0.1 else 'Decreasing' if forecast['trend_slope'] < -0.1 else 'Stable'
                 })
             
@@ -240,7 +326,7 @@ class PredictiveAnalytics:
                 'total_products_analyzed': len(product_forecasts),
                 'products_increasing': sum(1 for f in product_forecasts.values() if f['trend_slope'] > 0.1),
                 'products_decreasing': sum(1 for f in product_forecasts.values() if f['trend_slope'] < -0.1),
-                'avg_trend_slope': np.mean([f['trend_slope'] for f in product_forecasts.values()])
+                'avg_trend_slope': np.mean([f['trend_slope'] for f in product_forecasts.values()]) if product_forecasts else np.nan
             }
             
             return summary_df, metrics
@@ -254,43 +340,53 @@ class PredictiveAnalytics:
             return {}
         
         try:
-            data_copy = data.copy()
-            data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
-            
-            # Hour of day patterns
-            hourly_patterns = data_copy.groupby(data_copy['timestamp'].dt.hour).agg({
-                'total_amount': 'mean',
-                'transaction_id': 'count'
-            }).round(2)
+            # Hour and weekday of every transaction, from the converted timestamps (1970-01-01 was a Thursday)
+            timestamps = self._timestamps(data)
+            hours = timestamps.astype('datetime64[h]').astype(np.int64) % 24
+            weekdays = (timestamps.astype('datetime64[D]').astype(np.int64) + 3) % 7
+            amounts = data['total_amount'].to_numpy(dtype=np.float64)
+            
+            # Hour of day patterns, over the hours that have transactions
+            hour_counts = np.bincount(hours, minlength=24)
+            hour_means = _bucket_means(hours, amounts, 24)
+            active_hours = np.flatnonzero(hour_counts)
+            hourly_patterns = {
+                'total_amount': dict(zip(active_hours.tolist(), hour_means[active_hours].tolist())),
+                'transaction_id': dict(zip(active_hours.tolist(), hour_counts[active_hours].tolist()))
+            }
             
-            # Day of week patterns
-            daily_patterns = data_copy.groupby(data_copy['timestamp'].dt.day_name()).agg({
-                'total_amount': 'mean',
-                'transaction_id': 'count'
-            }).round(2)
+            # Day of week patterns, keyed by day name
+            day_counts = np.bincount(weekdays, minlength=7)
+            day_means = _bucket_means(weekdays, amounts, 7)
+            active_days = np.flatnonzero(day_counts)
+            daily_patterns = {
+                'total_amount': dict(zip(_DAY_NAMES[active_days], day_means[active_days].tolist())),
+                'transaction_id': dict(zip(_DAY_NAMES[active_days], day_counts[active_days].tolist()))
+            }
             
-            # Category seasonality
-            category_hourly = data_copy.groupby(['category', data_copy['timestamp'].dt.hour])['total_amount'].mean().unstack(fill_value=0)
+            # Category seasonality: mean amount per (category, hour) cell of a dense categories x 24 matrix
+            category_codes, categories = pd.factorize(data['category'], sort=True)
+            category_hourly = _bucket_means(
+                category_codes * 24 + hours, amounts, len(categories) * 24
+            ).reshape(len(categories), 24)
             
             # Peak hours by category
             category_peaks = {}
-            for category in category_hourly.index:
-                peak_hour = category_hourly.loc[category].idxmax()
-                peak_value = category_hourly.loc[category].max()
+            for category, peak_hour, peak_value in zip(categories, category_hourly.argmax(axis=1), category_hourly.max(axis=1)):
                 category_peaks[category] = {'peak_hour': peak_hour, 'peak_revenue': peak_value}
             
-            # Overall insights
-            peak_hour_overall = hourly_patterns['total_amount'].idxmax()
-            peak_day_overall = daily_patterns['total_amount'].idxmax()
+            # Overall insights; ties go to the earliest hour, as with idxmax/nlargest
+            by_count = active_hours[np.argsort(hour_counts[active_hours], kind='stable')]
+            by_count_desc = active_hours[np.argsort(-hour_counts[active_hours], kind='stable')]
             
             return {
-                'hourly_patterns': hourly_patterns.to_dict(),
-                'daily_patterns': daily_patterns.to_dict(),
+                'hourly_patterns': hourly_patterns,
+                'daily_patterns': daily_patterns,
                 'category_peaks': category_peaks,
-                'overall_peak_hour': peak_hour_overall,
-                'overall_peak_day': peak_day_overall,
-                'busiest_hours': hourly_patterns.nlargest(3, 'transaction_id').index.tolist(),
-                'quietest_hours': hourly_patterns.nsmallest(3, 'transaction_id').index.tolist()
+                'overall_peak_hour': active_hours[hour_means[active_hours].argmax()],
+                'overall_peak_day': _DAY_NAMES[active_days[day_means[active_days].argmax()]],
+                'busiest_hours': by_count_desc[:3].tolist(),
+                'quietest_hours': by_count[:3].tolist()
             }
             
         except Exception as e:
@@ -303,11 +399,11 @@ class PredictiveAnalytics:
         
         try:
             # Calculate inventory metrics
-            product_metrics = data.groupby(['product_name', 'category']).agg({
+            product_metrics = data.groupby(['product_name', 'category'], observed=True).agg({
                 'quantity': ['sum', 'mean', 'std'],
                 'total_amount': 'sum',
                 'transaction_id': 'count'
-            }).round(2)
+            })
             
             product_metrics.columns = ['total_sold', 'avg_per_transaction', 'quantity_std', 'total_revenue', 'transaction_count']
             product_metrics = product_metrics.reset_index()
@@ -317,71 +413,48 @@ class PredictiveAnalytics:
             product_metrics['variability'] = product_metrics['quantity_std'] / product_metrics['avg_per_transaction']
             product_metrics['variability'] = product_metrics['variability'].fillna(0)
             
-            # Classify products using ABC analysis (revenue) and XYZ analysis (variability)
-            # ABC Classification
-            product_metrics['revenue_cumsum'] = product_metrics.sort_values('total_revenue', ascending=False)['total_revenue'].cumsum()
-            total_revenue = product_metrics['total_revenue'].sum()
+            # Classify products using ABC analysis (revenue) and XYZ analysis (variability), as codes 0-2
+            # ABC Classification: share of revenue accumulated down the best sellers, in (0, 0.7], (0.7, 0.9], > 0.9
+            revenue = product_metrics['total_revenue'].to_numpy(dtype=np.float64)
+            total_revenue = revenue.sum()
             
             if total_revenue > 0:
-                product_metrics['revenue_percentage'] = product_metrics['revenue_cumsum'] / total_revenue
-                product_metrics['abc_class'] = pd.cut(
-                    product_metrics['revenue_percentage'],
-                    bins=[0, 0.7, 0.9, 1.0],
-                    labels=['A', 'B', 'C']
-                )
+                order = np.argsort(-revenue, kind='stable')
+                revenue_share = np.empty_like(revenue)
+                revenue_share[order] = np.cumsum(revenue[order]) / total_revenue
+                abc_code = np.searchsorted([0.7, 0.9], revenue_share)
             else:
-                product_metrics['abc_class'] = 'C'
-            
-            # XYZ Classification (variability)
-            if product_metrics['variability'].max() > 0:
-                product_metrics['xyz_class'] = pd.qcut(
-                    product_metrics['variability'],
-                    q=3,
-                    labels=['X', 'Y', 'Z'],
-                    duplicates='drop'
-                )
-            else:
-                product_metrics['xyz_class'] = 'X'
-            
-            # Generate recommendations
-            recommendations = []
-            
-            for _, row in product_metrics.iterrows():
-                abc = row['abc_class']
-                xyz = row['xyz_class']
-                
-                if abc == 'A' and xyz in ['X', 'Y']:
-                    rec = "High priority - maintain high stock levels with frequent monitoring"
-                elif abc == 'A' and xyz == 'Z':
-                    rec = "High revenue but unpredictable - maintain safety stock"
-                elif abc == 'B':
-                    rec = "Medium priority - moderate stock levels with regular reviews"
-                elif abc == 'C' and xyz in ['X', 'Y']:
-                    rec = "Low priority but predictable - minimal stock levels"
-                else:
-                    rec = "Low priority and unpredictable - consider discontinuation"
-                
-                recommendations.append({
-                    'product_name': row['product_name'],
-                    'category': row['category'],
-                    'abc_class': abc,
-                    'xyz_class': xyz,
-                    'recommendation': rec,
-                    'total_revenue': row['total_revenue'],
-                    'velocity': row['velocity'],
-                    'variability': row['variability']
-                })
-            
-            recommendations_df = pd.DataFrame(recommendations)
+                abc_code = np.full(len(revenue), 2)
+            product_metrics['abc_class'] = _ABC_CLASSES[abc_code]
+            
+            # XYZ Classification (variability): terciles with qcut's right-closed bins
+            variability = product_metrics['variability'].to_numpy(dtype=np.float64)
+            terciles = np.quantile(variability, [1 / 3, 2 / 3])
+            xyz_code = np.searchsorted(terciles, variability)
+            product_metrics['xyz_class'] = _XYZ_CLASSES[xyz_code]
+            
+            # Generate recommendations by looking up each product's class pair
+            recommendations_df = pd.DataFrame({
+                'product_name': product_metrics['product_name'].to_numpy(dtype=object),
+                'category': product_metrics['category'].to_numpy(dtype=object),
+                'abc_class': product_metrics['abc_class'],
+                'xyz_class': product_metrics['xyz_class'],
+                'recommendation': _RECOMMENDATIONS[abc_code, xyz_code],
+                'total_revenue': product_metrics['total_revenue'],
+                'velocity': product_metrics['velocity'],
+                'variability': product_metrics['variability']
+            })
+            abc_counts = np.bincount(abc_code, minlength=3)
+            xyz_counts = np.bincount(xyz_code, minlength=3)
             
             # Summary statistics
             summary = {
                 'total_products_analyzed': len(product_metrics),
-                'high_priority_products': len(recommendations_df[recommendations_df['abc_class'] == 'A']),
-                'medium_priority_products': len(recommendations_df[recommendations_df['abc_class'] == 'B']),
-                'low_priority_products': len(recommendations_df[recommendations_df['abc_class'] == 'C']),
-                'predictable_products': len(recommendations_df[recommendations_df['xyz_class'] == 'X']),
-                'unpredictable_products': len(recommendations_df[recommendations_df['xyz_class'] == 'Z'])
+                'high_priority_products': int(abc_counts[0]),
+                'medium_priority_products': int(abc_counts[1]),
+                'low_priority_products': int(abc_counts[2]),
+                'predictable_products': int(xyz_counts[0]),
+                'unpredictable_products': int(xyz_counts[2])
             }
             
             return {
@@ -392,4 +465,11 @@ class PredictiveAnalytics:
             }
             
         except Exception as e:
-            return {'error': f'Inventory optimization error: {str(e)}'}
\ No newline at end of file
+            return {'error': f'Inventory optimization error: {str(e)}'}
+
+def warmup():
+    """Run each kernel on tiny inputs so the first real request pays no startup cost"""
+    values = np.ones(2)
+    _lags_and_means(values, np.empty(2), np.empty(2), np.empty(2), np.empty(2), np.empty(2))
+
+warmup()
@@ -1,8 +1,50 @@
 import pandas as pd
 import numpy as np
+from numba import njit, types
 from datetime import datetime, timedelta
 import json
-from io import StringIO
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+# Kernel argument types; read-only 'A' arrays also accept writable and strided inputs
+_F8 = types.Array(types.float64, 1, 'A', readonly=True)
+_I8 = types.Array(types.int64, 1, 'A', readonly=True)
+
+@njit(types.Tuple((types.int64, types.float64))(_I8, _F8), cache=True)
+def _peak_hour(timestamps_ns, amounts):
+    """Hour of day with the most revenue and that revenue, binned in one pass over the transactions"""
+    revenue = np.zeros(24)
+    for i in range(timestamps_ns.shape[0]):
+        revenue[(timestamps_ns[i] // NS_PER_HOUR) % 24] += amounts[i]
+    peak = 0
+    for hour in range(1, 24):
+        if revenue[hour] > revenue[peak]:
+            peak = hour
+    return peak, revenue[peak]
+
+def _timestamps_ns(data):
+    """Timestamp column as int64 nanoseconds, parsing only when not already datetime64"""
+    timestamps = data['timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps)
+    return timestamps.to_numpy(dtype='datetime64[ns]').view('i8')
+
+# Report date stamps
+_DATE_FMT = "%B %d, %Y"
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+# Shared default for missing analytics frames; only ever read
+_EMPTY_FRAME = pd.DataFrame()
+
+# One segment's block in the customer analysis; the name is positional, the figures come from its stats
+_SEGMENT_DETAILS = """
+**{0}**
+- Customers: {customer_count}
+- Avg. Purchase Frequency: {avg_frequency:.1f}
+- Avg. Order Value: ${avg_monetary:.2f}
+- Total Revenue: ${total_revenue:,.2f}
+"""
 
 class ReportGenerator:
     """Generate comprehensive retail analytics reports"""
@@ -23,14 +65,20 @@ class ReportGenerator:
         
         report_sections = []
         
+        # Timestamps parsed once and handed to the sections that need them
+        timestamps_ns = _timestamps_ns(data)
+        
+        # One clock reading, so the header and footer stamps agree
+        now = datetime.now()
+        
         # Header
-        report_sections.append(self._generate_header())
+        report_sections.append(self._generate_header(now))
         
         # Executive Summary
         report_sections.append(self._executive_summary_template(data, analytics_results))
         
         # Sales Performance Analysis
-        report_sections.append(self._sales_performance_template(data, analytics_results))
+        report_sections.append(self._sales_performance_template(data, analytics_results, timestamps_ns))
         
         # Customer Analysis
         if customer_segments:
@@ -40,7 +88,7 @@ class ReportGenerator:
         report_sections.append(self._product_performance_template(data, analytics_results))
         
         # Operational Insights
-        report_sections.append(self._operational_insights_template(data, analytics_results))
+        report_sections.append(self._operational_insights_template(data, analytics_results, timestamps_ns))
         
         # Predictive Insights
         if predictions:
@@ -50,13 +98,13 @@ class ReportGenerator:
         report_sections.append(self._generate_recommendations(data, analytics_results, customer_segments))
         
         # Footer
-        report_sections.append(self._generate_footer())
+        report_sections.append(self._generate_footer(now))
         
         return "\n\n".join(report_sections)
     
-    def _generate_header(self):
+    def _generate_header(self, now):
         """Generate report header"""
-        current_date = datetime.now().strftime("%B %d, %Y")
+        current_date = now.strftime(_DATE_FMT)
         return f"""
 # 📊 RETAIL ANALYTICS COMPREHENSIVE REPORT
 ## Generated on {current_date}
@@ -73,6 +121,7 @@ class ReportGenerator:
         avg_transaction = summary_stats.get('average_transaction_value', 0)
         unique_customers = summary_stats.get('unique_customers', 0)
         unique_products = summary_stats.get('unique_products', 0)
+        revenue_per_customer = summary_stats.get('revenue_per_customer', 0)
         
         return f"""
 ## 🎯 EXECUTIVE SUMMARY
@@ -83,38 +132,41 @@ class ReportGenerator:
 - **Average Transaction Value**: ${avg_transaction:.2f}
 - **Unique Customers**: {unique_customers:,}
 - **Product Portfolio**: {unique_products} unique products
-- **Revenue per Customer**: ${summary_stats.get('revenue_per_customer', 0):.2f}
+- **Revenue per Customer**: ${revenue_per_customer:.2f}
 
 ### Business Health Overview
 The retail operation shows {'strong' if total_revenue > 10000 else 'moderate' if total_revenue > 5000 else 'developing'} performance metrics with a diverse customer base and product portfolio.
         """
     
-    def _sales_performance_template(self, data, analytics_results):
+    def _sales_performance_template(self, data, analytics_results, timestamps_ns=None):
         """Generate sales performance section"""
-        category_performance = analytics_results.get('category_performance', pd.DataFrame())
-        store_performance = analytics_results.get('store_performance', pd.DataFrame())
+        category_performance = analytics_results.get('category_performance', _EMPTY_FRAME)
+        store_performance = analytics_results.get('store_performance', _EMPTY_FRAME)
         
-        # Top performing category
+        # Top performing category and store, read as scalars from their columns
         top_category = ""
         top_store = ""
+        top_category_revenue = "N/A"
+        top_store_revenue = "N/A"
         
         if not category_performance.empty:
-            top_category = category_performance.iloc[0]['category']
-            top_category_revenue = category_performance.iloc[0]['revenue']
+            top_category = category_performance['category'].iat[0]
+            top_category_revenue = f"${category_performance['revenue'].iat[0]:,.2f}"
         
         if not store_performance.empty:
-            top_store = store_performance.iloc[0]['store_id']
-            top_store_revenue = store_performance.iloc[0]['revenue']
+            top_store = store_performance['store_id'].iat[0]
+            top_store_revenue = f"${store_performance['revenue'].iat[0]:,.2f}"
         
         # Sales trend analysis
-        data_copy = data.copy()
-        data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
-        
-        if len(data_copy) > 1:
-            # Calculate growth trend
-            data_sorted = data_copy.sort_values('timestamp')
-            recent_sales = data_sorted.tail(len(data_sorted)//2)['total_amount'].sum()
-            older_sales = data_sorted.head(len(data_sorted)//2)['total_amount'].sum()
+        if len(data) > 1:
+            # Calculate growth trend: the earliest and latest halves only need a partition, not a sort
+            amounts = data['total_amount'].to_numpy()
+            n, half = len(amounts), len(amounts) // 2
+            if timestamps_ns is None:
+                timestamps_ns = _timestamps_ns(data)
+            order = np.argpartition(timestamps_ns, (half, n - half))
+            recent_sales = amounts[order[n - half:]].sum()
+            older_sales = amounts[order[:half]].sum()
             growth_rate = ((recent_sales - older_sales) / older_sales * 100) if older_sales > 0 else 0
         else:
             growth_rate = 0
@@ -124,12 +176,12 @@ The retail operation shows {'strong' if total_revenue > 10000 else 'moderate' if
 
 ### Category Performance
 - **Top Performing Category**: {top_category}
-- **Category Revenue**: ${top_category_revenue:,.2f} if 'top_category_revenue' in locals() else 'N/A'
+- **Category Revenue**: {top_category_revenue}
 - **Total Categories**: {len(category_performance)} active categories
 
 ### Store Performance  
 - **Best Performing Store**: {top_store}
-- **Store Revenue**: ${top_store_revenue:,.2f} if 'top_store_revenue' in locals() else 'N/A'
+- **Store Revenue**: {top_store_revenue}
 - **Total Active Stores**: {len(store_performance)}
 
 ### Growth Analysis
@@ -147,9 +199,21 @@ Customer segmentation data not available.
         
         segment_stats = customer_segments['segment_stats']
         
-        # Find largest and most valuable segments
-        largest_segment = max(segment_stats.items(), key=lambda x: x[1]['customer_count'])
-        most_valuable_segment = max(segment_stats.items(), key=lambda x: x[1]['total_revenue'])
+        # Find largest and most valuable segments and count high-value ones in one walk;
+        # the first segment wins ties, as with max()
+        largest_segment = most_valuable_segment = None
+        largest_count = most_revenue = float('-inf')
+        high_value_segments = 0
+        for segment in segment_stats.items():
+            stats = segment[1]
+            customer_count = stats['customer_count']
+            total_revenue = stats['total_revenue']
+            if customer_count > largest_count:
+                largest_segment, largest_count = segment, customer_count
+            if total_revenue > most_revenue:
+                most_valuable_segment, most_revenue = segment, total_revenue
+            if stats['avg_monetary'] > 100:
+                high_value_segments += 1
         
         return f"""
 ## 👥 CUSTOMER ANALYSIS
@@ -163,26 +227,17 @@ Customer segmentation data not available.
 {self._format_segment_details(segment_stats)}
 
 ### Customer Insights
-- **High-Value Customer Ratio**: {sum(1 for s in segment_stats.values() if s['avg_monetary'] > 100) / len(segment_stats) * 100:.1f}%
+- **High-Value Customer Ratio**: {high_value_segments / len(segment_stats) * 100:.1f}%
 - **Customer Retention Opportunity**: Focus on segments with high recency scores
         """
     
     def _format_segment_details(self, segment_stats):
         """Format segment details for the report"""
-        details = []
-        for segment_name, stats in segment_stats.items():
-            details.append(f"""
-**{segment_name}**
-- Customers: {stats['customer_count']}
-- Avg. Purchase Frequency: {stats['avg_frequency']:.1f}
-- Avg. Order Value: ${stats['avg_monetary']:.2f}
-- Total Revenue: ${stats['total_revenue']:,.2f}
-            """)
-        return "\n".join(details)
+        return "\n".join(_SEGMENT_DETAILS.format(segment_name, **stats) for segment_name, stats in segment_stats.items())
     
     def _product_performance_template(self, data, analytics_results):
         """Generate product performance section"""
-        product_performance = analytics_results.get('product_performance', pd.DataFrame())
+        product_performance = analytics_results.get('product_performance', _EMPTY_FRAME)
         
         if product_performance.empty:
             return """
@@ -192,10 +247,20 @@ Product performance data not available.
         
         # Top products analysis
         top_products = product_performance.head(5)
+        revenue = product_performance['revenue'].to_numpy(dtype=np.float64)
+        revenue_concentration = revenue[:5].sum() / revenue.sum() * 100
         
         # Category diversity
         categories = product_performance['category'].nunique()
         
+        # Categories of the top products by count; ties keep category order for categoricals and
+        # first appearance otherwise, as value_counts does, and unobserved categories never appear
+        top_categories = top_products['category']
+        category_codes, observed_categories = pd.factorize(
+            top_categories, sort=isinstance(top_categories.dtype, pd.CategoricalDtype))
+        category_counts = np.bincount(category_codes[category_codes >= 0], minlength=len(observed_categories))
+        bestseller_categories = observed_categories[np.argsort(-category_counts, kind='stable')[:3]]
+        
         return f"""
 ## 🛍️ PRODUCT PERFORMANCE ANALYSIS
 
@@ -208,8 +273,8 @@ Product performance data not available.
 - **Product Diversity Score**: {categories / len(product_performance) * 100:.1f}%
 
 ### Performance Insights
-- **Revenue Concentration**: Top 5 products account for {top_products['revenue'].sum() / product_performance['revenue'].sum() * 100:.1f}% of total revenue
-- **Bestseller Categories**: {', '.join(top_products['category'].value_counts().head(3).index.tolist())}
+- **Revenue Concentration**: Top 5 products account for {revenue_concentration:.1f}% of total revenue
+- **Bestseller Categories**: {', '.join(bestseller_categories.astype(str))}
         """
     
     def _format_top_products(self, top_products):
@@ -217,31 +282,31 @@ Product performance data not available.
         if top_products.empty:
             return "No product data available."
         
-        formatted = []
-        for i, (_, product) in enumerate(top_products.iterrows(), 1):
-            formatted.append(f"""
-{i}. **{product['product_name']}** ({product['category']})
-   - Revenue: ${product['revenue']:,.2f}
-   - Units Sold: {product['quantity_sold']:,}
-   - Avg. Transaction Value: ${product['avg_transaction']:.2f}
-            """)
-        return "\n".join(formatted)
+        # Zip the columns rather than boxing every row into a Series
+        rows = zip(top_products['product_name'].to_numpy(), top_products['category'].to_numpy(),
+                   top_products['revenue'].to_numpy(), top_products['quantity_sold'].to_numpy(),
+                   top_products['avg_transaction'].to_numpy())
+        return "\n".join(f"""
+{i}. **{name}** ({category})
+   - Revenue: ${revenue:,.2f}
+   - Units Sold: {quantity:,}
+   - Avg. Transaction Value: ${avg_transaction:.2f}
+            """ for i, (name, category, revenue, quantity, avg_transaction) in enumerate(rows, 1))
     
-    def _operational_insights_template(self, data, analytics_results):
+    def _operational_insights_template(self, data, analytics_results, timestamps_ns=None):
         """Generate operational insights section"""
         trends = analytics_results.get('trends', {})
+        summary_stats = analytics_results.get('summary_stats', {})
         
-        # Calculate operational metrics
-        data_copy = data.copy()
-        data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
-        data_copy['hour'] = data_copy['timestamp'].dt.hour
-        
-        peak_hour = data_copy.groupby('hour')['total_amount'].sum().idxmax()
-        peak_revenue = data_copy.groupby('hour')['total_amount'].sum().max()
+        # Calculate operational metrics from the converted timestamps
+        if timestamps_ns is None:
+            timestamps_ns = _timestamps_ns(data)
+        peak_hour, peak_revenue = _peak_hour(timestamps_ns, data['total_amount'].to_numpy(dtype=np.float64))
         
-        # Payment method analysis
-        payment_methods = data_copy['payment_method'].value_counts()
-        preferred_payment = payment_methods.index[0] if len(payment_methods) > 0 else "N/A"
+        # Payment method analysis: observed methods and their counts from integer codes
+        payment_codes, payment_methods = pd.factorize(data['payment_method'], sort=True)
+        payment_counts = np.bincount(payment_codes[payment_codes >= 0], minlength=len(payment_methods))
+        preferred_payment = payment_methods[payment_counts.argmax()] if len(payment_methods) > 0 else "N/A"
         
         return f"""
 ## ⚙️ OPERATIONAL INSIGHTS
@@ -253,12 +318,12 @@ Product performance data not available.
 ### Payment & Transaction Patterns
 - **Preferred Payment Method**: {preferred_payment}
 - **Payment Diversity**: {len(payment_methods)} different payment methods accepted
-- **Average Transaction Processing**: {len(data_copy) / data_copy['timestamp'].dt.date.nunique():.1f} transactions per day
+- **Average Transaction Processing**: {len(data) / pd.unique(timestamps_ns // NS_PER_DAY).size:.1f} transactions per day
 
 ### Operational Efficiency
-- **Store Utilization**: {analytics_results.get('summary_stats', {}).get('unique_stores', 0)} active locations
-- **Product Turnover**: {analytics_results.get('summary_stats', {}).get('unique_products', 0)} products in rotation
-- **Customer Engagement**: {analytics_results.get('summary_stats', {}).get('transactions_per_customer', 0):.1f} avg transactions per customer
+- **Store Utilization**: {summary_stats.get('unique_stores', 0)} active locations
+- **Product Turnover**: {summary_stats.get('unique_products', 0)} products in rotation
+- **Customer Engagement**: {summary_stats.get('transactions_per_customer', 0):.1f} avg transactions per customer
         """
     
     def _predictive_insights_template(self, predictions):
@@ -271,14 +336,15 @@ Predictive analytics data not available.
         
         sales_forecast = predictions.get('sales_forecast', {})
         demand_forecast = predictions.get('demand_forecast', {})
+        forecast_total = sales_forecast.get('forecast_total', 0)
         
         return f"""
 ## 🔮 PREDICTIVE INSIGHTS
 
 ### Sales Forecasting
 - **Forecast Accuracy**: {sales_forecast.get('model_score', 0) * 100:.1f}%
-- **Predicted Revenue (7 days)**: ${sales_forecast.get('forecast_total', 0):,.2f}
-- **Growth Trajectory**: {'Upward' if sales_forecast.get('forecast_total', 0) > 0 else 'Stable'}
+- **Predicted Revenue (7 days)**: ${forecast_total:,.2f}
+- **Growth Trajectory**: {'Upward' if forecast_total > 0 else 'Stable'}
 
 ### Demand Predictions
 - **Products Analyzed**: {demand_forecast.get('total_products_analyzed', 0)}
@@ -288,7 +354,7 @@ Predictive analytics data not available.
 ### Strategic Implications
 - **Inventory Planning**: Adjust stock levels based on demand forecasts
 - **Resource Allocation**: Focus on high-growth product categories
-- **Market Opportunities**: {'Expansion potential identified' if sales_forecast.get('forecast_total', 0) > 10000 else 'Maintain current operations'}
+- **Market Opportunities**: {'Expansion potential identified' if forecast_total > 10000 else 'Maintain current operations'}
         """
     
     def _generate_recommendations(self, data, analytics_results, customer_segments=None):
@@ -312,7 +378,7 @@ Predictive analytics data not available.
                 recommendations.append(f"🎯 **Customer Retention**: Focus on re-engaging {', '.join(high_risk_segments)} segments")
         
         # Product recommendations
-        category_performance = analytics_results.get('category_performance', pd.DataFrame())
+        category_performance = analytics_results.get('category_performance', _EMPTY_FRAME)
         if not category_performance.empty:
             top_category = category_performance.iloc[0]['category']
             recommendations.append(f"📦 **Inventory Focus**: Expand {top_category} category based on strong performance")
@@ -348,7 +414,7 @@ Predictive analytics data not available.
 - Customer satisfaction scores
         """
     
-    def _generate_footer(self):
+    def _generate_footer(self, now):
         """Generate report footer"""
         return f"""
 ---
@@ -357,9 +423,9 @@ Predictive analytics data not available.
 
 This comprehensive retail analytics report provides insights into sales performance, customer behavior, product analytics, and operational efficiency. The recommendations are based on data-driven analysis and should be reviewed regularly to ensure continued business growth.
 
-**Report Generated**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+**Report Generated**: {now.strftime(_TS_FMT)}
 **Data Analysis Period**: Based on available transaction data
-**Next Review Date**: {(datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")}
+**Next Review Date**: {(now + timedelta(days=30)).strftime("%Y-%m-%d")}
 
 ---
         """
@@ -369,30 +435,19 @@ This comprehensive retail analytics report provides insights into sales performa
         if filename is None:
             filename = f"retail_data_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
-        # Convert to CSV string
-        output = StringIO()
-        data.to_csv(output, index=False)
-        csv_content = output.getvalue()
-        output.close()
+        # pandas writes into its own buffer and hands back the string
+        csv_content = data.to_csv(index=False)
         
         return csv_content, filename
     
-    def generate_kpi_dashboard_data(self, data, analytics_results):
-        """Generate KPI data for dashboard display"""
+    def generate_kpi_dashboard_data(self, data, analytics_results, include_recent=True):
+        """Generate KPI data for dashboard display; include_recent=False skips the last-24h window"""
         if data.empty:
             return {}
         
         summary_stats = analytics_results.get('summary_stats', {})
         trends = analytics_results.get('trends', {})
         
-        # Calculate additional KPIs
-        data_copy = data.copy()
-        data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'])
-        
-        # Recent performance (last 24 hours)
-        recent_cutoff = data_copy['timestamp'].max() - timedelta(hours=24)
-        recent_data = data_copy[data_copy['timestamp'] >= recent_cutoff]
-        
         kpis = {
             # Core metrics
             'total_revenue': summary_stats.get('total_revenue', 0),
@@ -404,20 +459,35 @@ This comprehensive retail analytics report provides insights into sales performa
             'revenue_growth': trends.get('revenue_growth_percent', 0),
             'transaction_growth': trends.get('transaction_growth_percent', 0),
             
-            # Recent performance
-            'recent_revenue_24h': recent_data['total_amount'].sum(),
-            'recent_transactions_24h': len(recent_data),
-            'recent_customers_24h': recent_data['customer_id'].nunique(),
-            
             # Performance indicators
             'revenue_per_customer': summary_stats.get('revenue_per_customer', 0),
             'transactions_per_customer': summary_stats.get('transactions_per_customer', 0),
             'peak_hour': trends.get('peak_hour', 'N/A'),
             
             # Category insights
-            'total_categories': len(analytics_results.get('category_performance', pd.DataFrame())),
+            'total_categories': len(analytics_results.get('category_performance', _EMPTY_FRAME)),
             'total_stores': summary_stats.get('unique_stores', 0),
             'total_products': summary_stats.get('unique_products', 0)
         }
         
-        return kpis
\ No newline at end of file
+        # Recent performance
+        if include_recent:
+            kpis.update(self._recent_kpis(data))
+        
+        return kpis
+    
+    def _recent_kpis(self, data):
+        """Revenue, transactions and distinct customers over the last 24 hours of data"""
+        # Mask the int64 nanoseconds and index only the columns read
+        ts_ns = _timestamps_ns(data)
+        recent = ts_ns >= ts_ns.max() - 24 * NS_PER_HOUR
+        
+        # Distinct recent customers: a set is fastest for string IDs, np.unique for numeric ones
+        recent_ids = data['customer_id'].to_numpy()[recent]
+        recent_customers = len(set(recent_ids)) if recent_ids.dtype == object else np.unique(recent_ids).size
+        
+        return {
+            'recent_revenue_24h': data['total_amount'].to_numpy()[recent].sum(),
+            'recent_transactions_24h': int(np.count_nonzero(recent)),
+            'recent_customers_24h': recent_customers
+        }